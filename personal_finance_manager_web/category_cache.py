@@ -0,0 +1,135 @@
+# personal_finance_manager_web/category_cache.py
+#
+# Per-user cache of category lists.
+#
+# Category lists are read on nearly every page (transaction and budget forms,
+# the transaction filters, reports) and again to validate a posted category_id,
+# but they change rarely. Each user's categories are loaded with one query as
+# immutable CategoryRow tuples (see read_models.py) and kept in an in-process
+# LRU (report_cache.MemoryBackend) bounded by CATEGORY_CACHE_MAX_USERS users and
+# CATEGORY_CACHE_TTL seconds.
+#
+# A user's entry is dropped when a session commits a change to one of their
+# categories (the same session-event scheme as report_cache.py), or when
+# mark_user_dirty was called for bulk Core statements. Invalidation is per
+# process, so with several workers the TTL bounds how long another worker can
+# serve a stale list. Validation doesn't trust a stale list, though: when
+# get_category misses, the user's list is reloaded before the id is rejected,
+# so a category just created on another worker is accepted.
+
+import threading
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import Category
+from report_cache import MemoryBackend
+import read_models
+
+_PENDING_KEY = 'category_cache_dirty_users'
+
+
+class UserCategories:
+    """One user's categories, sorted by name, with an id index."""
+    __slots__ = ('rows', 'by_id')
+
+    def __init__(self, rows):
+        self.rows = tuple(rows)
+        self.by_id = {row.id: row for row in self.rows}
+
+    def of_type(self, category_type=None):
+        if category_type is None:
+            return list(self.rows)
+        return [row for row in self.rows if row.type == category_type]
+
+    def get(self, category_id, category_type=None):
+        row = self.by_id.get(category_id)
+        if row is None or (category_type is not None and row.type != category_type):
+            return None
+        return row
+
+
+class CategoryCache:
+    def __init__(self, max_users=1024, ttl=None):
+        self.backend = MemoryBackend(max_entries=max_users)
+        self.ttl = ttl
+        self._epoch = 0 # Bumped by every invalidation
+        self._lock = threading.Lock()
+
+    def get(self, user_id, reload=False):
+        entry = None if reload else self.backend.get(user_id)
+        if entry is None:
+            epoch = self._epoch
+            entry = UserCategories(read_models.category_rows(user_id))
+            with self._lock:
+                # Don't store a list loaded while a category commit invalidated entries
+                if epoch == self._epoch:
+                    self.backend.set(user_id, entry, self.ttl)
+        return entry
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            self._epoch += 1
+            self.backend.delete(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self.backend.clear()
+
+
+def get_category_cache():
+    return current_app.extensions['category_cache']
+
+
+def user_categories(user_id, category_type=None):
+    """The user's categories (optionally of one type) as CategoryRow, sorted by name."""
+    return get_category_cache().get(user_id).of_type(category_type)
+
+
+def get_category(user_id, category_id, category_type=None):
+    """The user's CategoryRow with this id (and type, if given), or None."""
+    cache = get_category_cache()
+    row = cache.get(user_id).get(category_id, category_type)
+    if row is None:
+        # Another worker may have created or changed it since this one cached the list
+        row = cache.get(user_id, reload=True).get(category_id, category_type)
+    return row
+
+
+# --- Write-driven invalidation (SQLAlchemy session events) ---
+
+def _after_flush(session, flush_context):
+    dirty_users = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Category) and obj.user_id is not None:
+            dirty_users.add(obj.user_id)
+
+
+def mark_user_dirty(session, user_id):
+    """Drop `user_id`'s cached categories when `session` commits (for bulk Core statements)."""
+    session.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+
+def _after_commit(session):
+    dirty_users = session.info.pop(_PENDING_KEY, None)
+    if dirty_users and has_app_context() and 'category_cache' in current_app.extensions:
+        cache = current_app.extensions['category_cache']
+        for user_id in dirty_users:
+            cache.invalidate_user(user_id)
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def init_app(app):
+    app.extensions['category_cache'] = CategoryCache(
+        max_users=app.config.get('CATEGORY_CACHE_MAX_USERS', 1024),
+        ttl=app.config.get('CATEGORY_CACHE_TTL')
+    )
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_rollback', _after_rollback)
@@ -0,0 +1,197 @@
+# personal_finance_manager_web/category_merge.py
+#
+# Deleting a category, either moving its transactions and budgets to another
+# category of the same type (a merge), or moving its transactions to the user's
+# "uncategorized" category of that type (created when first needed) and deleting
+# its budgets. Transactions are only deleted with the category when asked to
+# explicitly (delete_transactions=True).
+#
+# Everything is done with set-based statements (UPDATE transactions SET
+# category_id = ..., DELETE ... WHERE category_id = ...) instead of loading the
+# category's transactions into the session, so the cost in memory does not
+# depend on how many transactions the category has. The rollups are adjusted
+# from the category's daily_totals rows (one delta per day with activity) via
+# rollups.apply_deltas, and the report and category caches are invalidated
+# explicitly since these statements bypass the ORM flush.
+#
+# The category and its transactions are locked before the daily_totals rows are
+# read (see _lock_category), so a transaction added to or changed in the
+# category meanwhile can't make the deltas miss it.
+
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import func, select, update
+
+from database import db
+from models import Budget, BudgetProgress, Category, DailyTotal, MonthlyTotal, Transaction
+import category_cache
+import report_cache
+import rollups
+
+# Where delete_category moves the transactions of a deleted category, by type
+UNCATEGORIZED_NAMES = {'expense': 'Uncategorized expenses', 'income': 'Uncategorized income'}
+
+
+def _get_category(session, user_id, category_id):
+    category = session.execute(
+        select(Category.id, Category.type).where(Category.id == category_id, Category.user_id == user_id)
+    ).first()
+    if category is None:
+        raise ValueError('Category not found.')
+    return category
+
+
+def _lock_category(session, user_id, category_id):
+    """Hold off writes to the category's transactions until commit.
+
+    PostgreSQL: FOR UPDATE on the category row blocks inserting or moving
+    transactions into it (their foreign key check takes a KEY SHARE lock on it),
+    and FOR UPDATE on its transactions blocks edits and deletes. SQLite allows
+    one writer at a time; a no-op write takes that lock now rather than at the
+    first UPDATE.
+    """
+    if session.get_bind().dialect.name == 'postgresql':
+        session.execute(select(Category.id).where(Category.id == category_id).with_for_update())
+        locked = select(Transaction.id).where(
+            Transaction.user_id == user_id, Transaction.category_id == category_id
+        ).with_for_update().subquery()
+        session.execute(select(func.count()).select_from(locked))
+    else:
+        session.execute(update(Category).where(Category.id == category_id).values(type=Category.type))
+
+
+def _uncategorized(session, user_id, category_type):
+    """Id of the user's uncategorized category of `category_type`, created if missing."""
+    name = UNCATEGORIZED_NAMES[category_type]
+    category = session.execute(
+        select(Category.id, Category.type).where(Category.user_id == user_id, Category.name == name)
+    ).first()
+    if category is None:
+        return session.execute(
+            Category.__table__.insert().values(user_id=user_id, name=name, type=category_type)
+            .returning(Category.__table__.c.id)
+        ).scalar_one()
+    if category.type != category_type:
+        raise ValueError(f'Rename your "{name}" category, or choose a category to move the transactions to.')
+    return category.id
+
+
+def _rollup_deltas(session, user_id, source_id, target_id=None):
+    """Deltas that move (or, without a target, remove) the source category's rollup totals."""
+    deltas = defaultdict(Decimal)
+    rows = session.execute(
+        select(DailyTotal.day, DailyTotal.type, DailyTotal.total).where(
+            DailyTotal.user_id == user_id, DailyTotal.category_id == source_id, DailyTotal.total != 0
+        )
+    )
+    for day, txn_type, total in rows:
+        deltas[(user_id, day, txn_type, source_id)] -= total
+        if target_id is not None:
+            deltas[(user_id, day, txn_type, target_id)] += total
+    return deltas
+
+
+def _delete_category_rows(session, user_id, category_id):
+    # The rollup rows are all zero by now; ondelete=CASCADE would remove them too,
+    # but SQLite only enforces it with PRAGMA foreign_keys
+    for table in (DailyTotal.__table__, MonthlyTotal.__table__):
+        session.execute(table.delete().where(table.c.user_id == user_id, table.c.category_id == category_id))
+    budget_ids = select(Budget.id).where(Budget.category_id == category_id).scalar_subquery()
+    session.execute(BudgetProgress.__table__.delete().where(BudgetProgress.budget_id.in_(budget_ids)))
+    session.execute(Budget.__table__.delete().where(Budget.category_id == category_id))
+    session.execute(Category.__table__.delete().where(Category.id == category_id))
+
+
+def _finish(session, user_id):
+    report_cache.mark_user_dirty(session, user_id)
+    category_cache.mark_user_dirty(session, user_id)
+    session.commit()
+
+
+def merge_category(user_id, source_id, target_id):
+    """Move the source category's transactions and budgets to `target_id`, then delete it.
+
+    Where both categories have a budget starting on the same day, the two are
+    combined into the target's budget (amounts added). Returns the number of
+    transactions moved. Raises ValueError if the categories don't qualify.
+    """
+    session = db.session
+    if source_id == target_id:
+        raise ValueError('Choose a different category to merge into.')
+    source = _get_category(session, user_id, source_id)
+    target = _get_category(session, user_id, target_id)
+    if source.type != target.type:
+        raise ValueError(f'A {source.type} category can only be merged into another {source.type} category.')
+
+    _lock_category(session, user_id, source_id)
+    deltas = _rollup_deltas(session, user_id, source_id, target_id)
+    moved = session.execute(
+        Transaction.__table__.update().where(
+            Transaction.user_id == user_id, Transaction.category_id == source_id
+        ).values(category_id=target_id, updated_at=datetime.utcnow())
+    ).rowcount
+    rollups.apply_deltas(session, deltas)
+
+    budgets = Budget.__table__
+    source_budget = budgets.alias('source_budget')
+    same_start = select(source_budget.c.amount).where(
+        source_budget.c.category_id == source_id, source_budget.c.start_date == budgets.c.start_date
+    )
+    # Same-day budgets: fold the source budget into the target's, then drop it
+    session.execute(budgets.update().where(
+        budgets.c.category_id == target_id, same_start.exists()
+    ).values(amount=budgets.c.amount + same_start.scalar_subquery()))
+    target_starts = select(budgets.c.start_date).where(budgets.c.category_id == target_id)
+    session.execute(BudgetProgress.__table__.delete().where(BudgetProgress.budget_id.in_(
+        select(budgets.c.id).where(budgets.c.category_id == source_id, budgets.c.start_date.in_(target_starts))
+    )))
+    session.execute(budgets.delete().where(
+        budgets.c.category_id == source_id, budgets.c.start_date.in_(target_starts)
+    ))
+    session.execute(budgets.update().where(budgets.c.category_id == source_id).values(
+        category_id=target_id, updated_at=datetime.utcnow()
+    ))
+    target_budget_ids = session.execute(select(Budget.id).where(Budget.category_id == target_id)).scalars().all()
+    if target_budget_ids:
+        rollups.recompute_budget_progress(session, target_budget_ids)
+
+    _delete_category_rows(session, user_id, source_id)
+    _finish(session, user_id)
+    return moved
+
+
+def delete_category(user_id, category_id, delete_transactions=False):
+    """Delete a category and its budgets, moving its transactions to the user's uncategorized category.
+
+    With delete_transactions=True the transactions are deleted with it instead.
+    Returns the number of transactions moved or deleted. Raises ValueError if
+    the transactions have nowhere to go.
+    """
+    session = db.session
+    category = _get_category(session, user_id, category_id)
+    _lock_category(session, user_id, category_id)
+    statement = Transaction.__table__.delete()
+    target_id = None
+    if not delete_transactions and transaction_count(user_id, category_id):
+        target_id = _uncategorized(session, user_id, category.type)
+        if target_id == category_id:
+            raise ValueError('Choose a category to move these transactions to, or delete them with the category.')
+        statement = Transaction.__table__.update().values(category_id=target_id, updated_at=datetime.utcnow())
+
+    deltas = _rollup_deltas(session, user_id, category_id, target_id)
+    affected = session.execute(
+        statement.where(Transaction.user_id == user_id, Transaction.category_id == category_id)
+    ).rowcount
+    rollups.apply_deltas(session, deltas)
+
+    _delete_category_rows(session, user_id, category_id)
+    _finish(session, user_id)
+    return affected
+
+
+def transaction_count(user_id, category_id):
+    return db.session.query(func.count(Transaction.id)).filter(
+        Transaction.user_id == user_id, Transaction.category_id == category_id
+    ).scalar()
@@ -0,0 +1,134 @@
+# personal_finance_manager_web/chart_cache.py
+#
+# Content-addressed cache for rendered chart artifacts (Plotly HTML fragments,
+# base64 PNGs). The key is a SHA-256 of the renderer name, the input series and
+# the chart options, so identical data is never rendered twice and there is
+# nothing to invalidate: different data simply hashes to a different key.
+#
+# Two tiers, each with a byte budget and least-recently-used eviction:
+#   memory - CHART_CACHE_MAX_BYTES (per process)
+#   disk   - CHART_CACHE_DIR / CHART_CACHE_DISK_MAX_BYTES (optional, shared by workers)
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+
+# Bump when a renderer's output changes, so old artifacts stop being served
+KEY_VERSION = 2
+
+
+def chart_key(render, series, options):
+    payload = json.dumps(
+        [KEY_VERSION, f'{render.__module__}.{render.__qualname__}', series, options],
+        sort_keys=True, separators=(',', ':'), default=str # default=str covers Decimal/date
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ChartCache:
+    def __init__(self, max_memory_bytes=64 * 1024 * 1024, directory=None, max_disk_bytes=512 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict() # key -> artifact
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def render(self, render, series, **options):
+        """Return render(series, **options), reusing a cached artifact for identical input."""
+        key = chart_key(render, series, options)
+        artifact = self._memory_get(key)
+        if artifact is None and self.directory:
+            artifact = self._disk_get(key)
+            if artifact is not None:
+                self._memory_set(key, artifact)
+        if artifact is None:
+            artifact = render(series, **options)
+            self._memory_set(key, artifact)
+            if self.directory:
+                self._disk_set(key, artifact)
+        return artifact
+
+    # --- Memory tier ---
+
+    def _memory_get(self, key):
+        with self._lock:
+            artifact = self._memory.get(key)
+            if artifact is not None:
+                self._memory.move_to_end(key)
+            return artifact
+
+    def _memory_set(self, key, artifact):
+        size = len(artifact)
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._memory[key] = artifact
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    # --- Disk tier ---
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.chart')
+
+    def _disk_get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                artifact = fh.read()
+            os.utime(path) # Mark as recently used for eviction
+            return artifact
+        except OSError:
+            return None
+
+    def _disk_set(self, key, artifact):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            fh.write(artifact)
+        os.replace(tmp_path, self._path(key))
+        self._prune_disk()
+
+    def _prune_disk(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.chart'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def render_chart(render, series, **options):
+    return current_app.extensions['chart_cache'].render(render, series, **options)
+
+
+def init_app(app):
+    app.extensions['chart_cache'] = ChartCache(
+        max_memory_bytes=app.config.get('CHART_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+        directory=app.config.get('CHART_CACHE_DIR'),
+        max_disk_bytes=app.config.get('CHART_CACHE_DISK_MAX_BYTES', 512 * 1024 * 1024)
+    )
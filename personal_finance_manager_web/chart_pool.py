@@ -0,0 +1,108 @@
+# personal_finance_manager_web/chart_pool.py
+#
+# Dedicated process pool for matplotlib rendering.
+#
+# Rendering a figure takes hundreds of milliseconds of CPU; doing it in the
+# request thread pins the worker and (with pyplot) races on global state when
+# the server runs threaded. Renders are instead submitted to a small pool of
+# worker processes:
+#   CHART_POOL_WORKERS      - worker processes (0 renders inline, e.g. for local dev)
+#   CHART_POOL_MAX_PENDING  - renders queued or running at once; beyond that we fail fast
+#   CHART_RENDER_TIMEOUT    - seconds to wait for a render before giving up
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+
+import charts
+
+
+class ChartRenderError(Exception):
+    pass
+
+
+class ChartQueueFull(ChartRenderError):
+    pass
+
+
+class ChartRenderTimeout(ChartRenderError):
+    pass
+
+
+class ChartRenderPool:
+    def __init__(self, max_workers=2, max_pending=8, timeout=10):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created lazily, and recreated after a fork, so pre-forking servers do not
+        # share (or inherit a broken copy of) the parent's pool.
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) in a worker process and return its result."""
+        if self.max_workers == 0:
+            return fn(*args, **kwargs)
+
+        if not self._slots.acquire(blocking=False):
+            raise ChartQueueFull('Too many chart renders pending')
+        try:
+            future = self._get_executor().submit(fn, *args, **kwargs)
+        except BrokenProcessPool as e:
+            self._slots.release()
+            with self._lock:
+                self._executor = None
+            raise ChartRenderError(f'Chart worker crashed: {e}') from e
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel() # Only helps if it has not started; a running render keeps its slot until done
+            raise ChartRenderTimeout(f'Chart render exceeded {self.timeout}s')
+        except BrokenProcessPool as e:
+            # A worker died (e.g. OOM-killed); start a fresh pool on the next render
+            with self._lock:
+                self._executor = None
+            raise ChartRenderError(f'Chart worker crashed: {e}') from e
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# --- Pooled renderers (module-level so chart_cache can key on their names) ---
+
+def expense_bar_image(breakdown, title, fmt='png'):
+    return current_app.extensions['chart_pool'].run(charts.expense_bar_image, breakdown, title=title, fmt=fmt)
+
+
+def init_app(app):
+    pool = ChartRenderPool(
+        max_workers=app.config.get('CHART_POOL_WORKERS', 2),
+        max_pending=app.config.get('CHART_POOL_MAX_PENDING', 8),
+        timeout=app.config.get('CHART_RENDER_TIMEOUT', 10)
+    )
+    app.extensions['chart_pool'] = pool
+    atexit.register(pool.shutdown)
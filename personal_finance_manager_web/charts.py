@@ -0,0 +1,79 @@
+# personal_finance_manager_web/charts.py
+#
+# Chart renderers for the report pages. Each function takes plain series data
+# (lists/dicts of numbers and labels) plus display options and returns the
+# rendered artifact as a string, which is what chart_cache.py caches.
+#
+# plotly and matplotlib are imported inside the functions that use them:
+# together they cost about a second and hundreds of MB per worker, and most
+# workers only ever serve list/form pages. scripts/check_import_time.py keeps
+# them out of the app's import path.
+
+import io
+import base64
+
+
+def expense_pie_html(chart_data, title):
+    # chart_data: [{'category': name, 'amount': float}, ...]
+    import plotly.graph_objects as go
+
+    fig_pie = go.Figure(go.Pie(
+        labels=[d['category'] for d in chart_data],
+        values=[d['amount'] for d in chart_data],
+        hole=0.3 # Creates a donut chart
+    ))
+    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+    fig_pie.update_layout(title=title, showlegend=True, margin=dict(t=50, b=0, l=0, r=0)) # Adjust margins
+    return fig_pie.to_html(full_html=False, include_plotlyjs='cdn')
+
+
+def income_expense_trend_html(monthly_data, title):
+    # monthly_data: [{'month': 'January 2025', 'income': ..., 'expense': ...}, ...], oldest first
+    import plotly.graph_objects as go
+
+    months = [m['month'] for m in monthly_data]
+    fig_trend = go.Figure()
+    fig_trend.add_trace(go.Scatter(x=months, y=[float(m['income']) for m in monthly_data], mode='lines+markers', name='Income', line=dict(color='green')))
+    fig_trend.add_trace(go.Scatter(x=months, y=[float(m['expense']) for m in monthly_data], mode='lines+markers', name='Expense', line=dict(color='red')))
+
+    fig_trend.update_layout(
+        title=title,
+        xaxis_title='Month',
+        yaxis_title='Amount (₹)',
+        hovermode='x unified',
+        margin=dict(t=50, b=0, l=0, r=0)
+    )
+    return fig_trend.to_html(full_html=False, include_plotlyjs='cdn')
+
+
+def expense_bar_image(breakdown, title, fmt='png'):
+    # breakdown: [{'name': category name, 'total_spent': amount}, ...]
+    # Uses the object-oriented Figure/Agg API rather than pyplot, so no global
+    # figure state is touched. Normally runs inside a chart_pool.py worker process.
+    # Returns base64-encoded PNG data, or SVG markup when fmt == 'svg'.
+    import matplotlib
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    categories = [d['name'] for d in breakdown]
+    amounts = [float(d['total_spent']) for d in breakdown] # Convert Decimal to float
+
+    fig = Figure(figsize=(10, 6)) # Adjust figure size as needed
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.bar(categories, amounts, color='skyblue')
+    ax.set_ylabel('Amount (₹)')
+    ax.set_title(title)
+    ax.tick_params(axis='x', labelrotation=45) # Rotate labels if they overlap
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    fig.tight_layout() # Adjust layout to prevent labels from being cut off
+
+    buffer = io.BytesIO()
+    if fmt == 'svg':
+        # Keep text as <text> elements instead of glyph paths: much smaller output
+        with matplotlib.rc_context({'svg.fonttype': 'none'}):
+            fig.savefig(buffer, format='svg', bbox_inches='tight', metadata={'Date': None})
+        return buffer.getvalue().decode('utf-8')
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    return base64.b64encode(buffer.getvalue()).decode()
@@ -1,8 +1,11 @@
 # database.py
 from flask_sqlalchemy import SQLAlchemy
 
+from db_routing import RoutingSession
+
 # Initialize SQLAlchemy here, but tie it to the Flask app later in app.py
-db = SQLAlchemy()
+# (the session class routes @read_replica views' reads to the replica, see db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # You might add a function here later to create tables if you're not using migrations
 # def init_db(app):
@@ -0,0 +1,156 @@
+# personal_finance_manager_web/db_pool.py
+#
+# Connection pool settings and instrumentation.
+#
+# engine_options() turns the DB_* settings in Config into SQLALCHEMY_ENGINE_OPTIONS:
+#   DB_POOL_SIZE / DB_MAX_OVERFLOW - persistent connections / extra ones under load
+#   DB_POOL_TIMEOUT                - seconds to wait for a free connection before failing
+#   DB_POOL_RECYCLE                - seconds before a connection is replaced (idle timeouts, failovers)
+#   DB_POOL_PRE_PING               - test connections on checkout (drops dead ones transparently)
+#   DB_STATEMENT_TIMEOUT_MS        - PostgreSQL statement_timeout, 0 to disable
+#   DB_PGBOUNCER                   - PgBouncer transaction pooling compatible mode:
+#       no startup parameters (PgBouncer rejects `options`; set statement_timeout
+#       on the database role instead) and no server-side prepared statements
+#       (psycopg 3), since consecutive transactions may run on different servers.
+#
+# The pool is an InstrumentedQueuePool, which counts checkouts, the time they
+# spent waiting for a connection, and (separately) the waits that timed out;
+# pool_stats() reports those with the pool's
+# current in-use/idle/overflow numbers (served by /diagnostics/pool when
+# DIAGNOSTICS_TOKEN is set), so slow requests can be attributed to queries or
+# to pool saturation.
+#
+# SQLite engines (local development and benchmarking) get pragmas on every new
+# connection instead, see init_app:
+#   SQLITE_JOURNAL_MODE    - WAL lets readers run alongside the single writer
+#   SQLITE_SYNCHRONOUS     - NORMAL only syncs at WAL checkpoints (safe in WAL mode)
+#   SQLITE_BUSY_TIMEOUT_MS - how long a writer waits for the lock instead of failing
+#   SQLITE_CACHE_KB        - page cache per connection
+# plus foreign_keys=ON, so ON DELETE CASCADE behaves as on PostgreSQL, and
+# temp_store=MEMORY for the sorts and GROUP BYs of the reports.
+
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection, and how many timed out."""
+
+    SLOW_WAIT_SECONDS = 0.1
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.slow_waits = 0 # Checkouts that waited longer than SLOW_WAIT_SECONDS
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.checkout_timeouts += 1
+            raise
+        # Only successful checkouts count towards checkouts and the wait times
+        waited = time.perf_counter() - started
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            if waited > self.SLOW_WAIT_SECONDS:
+                self.slow_waits += 1
+        return connection
+
+
+def engine_options(config, uri=None):
+    """Engine options for `uri` (SQLALCHEMY_DATABASE_URI by default) from the DB_* settings."""
+    url = make_url(uri or config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite':
+        return {} # Flask-SQLAlchemy picks a suitable pool for SQLite files and :memory:
+
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+    connect_args = {}
+    if url.get_backend_name() == 'postgresql':
+        if config['DB_PGBOUNCER']:
+            if url.get_driver_name() == 'psycopg':
+                connect_args['prepare_threshold'] = None
+        elif config['DB_STATEMENT_TIMEOUT_MS']:
+            connect_args['options'] = f"-c statement_timeout={int(config['DB_STATEMENT_TIMEOUT_MS'])}"
+    if connect_args:
+        options['connect_args'] = connect_args
+    return options
+
+
+def pool_stats(engine):
+    """Current pool usage and checkout-wait counters, as a JSON-friendly dict."""
+    pool = engine.pool
+    stats = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': pool.overflow(),
+            'max_overflow': pool._max_overflow,
+            'timeout_seconds': pool.timeout(),
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._stats_lock:
+            checkouts = pool.checkouts
+            stats.update({
+                'checkouts': checkouts,
+                'checkout_timeouts': pool.checkout_timeouts,
+                'slow_waits': pool.slow_waits,
+                'wait_ms_total': round(pool.wait_seconds_total * 1000, 3),
+                'wait_ms_avg': round(pool.wait_seconds_total * 1000 / checkouts, 3) if checkouts else 0.0,
+                'wait_ms_max': round(pool.wait_seconds_max * 1000, 3),
+            })
+    return stats
+
+
+# --- SQLite ---
+
+def sqlite_pragmas(config):
+    return [
+        ('journal_mode', config['SQLITE_JOURNAL_MODE']),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('busy_timeout', int(config['SQLITE_BUSY_TIMEOUT_MS'])),
+        ('cache_size', -int(config['SQLITE_CACHE_KB'])), # Negative: KiB rather than pages
+        ('foreign_keys', 'ON'),
+        ('temp_store', 'MEMORY'),
+    ]
+
+
+def _pragma_listener(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+    return set_pragmas
+
+
+def init_app(app):
+    """Apply the SQLite pragmas to the app's SQLite engines. Call after db.init_app."""
+    pragmas = sqlite_pragmas(app.config)
+    with app.app_context():
+        for engine in app.extensions['sqlalchemy'].engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _pragma_listener(pragmas))
@@ -0,0 +1,180 @@
+# personal_finance_manager_web/db_routing.py
+#
+# Read-replica routing.
+#
+# With DATABASE_REPLICA_URL set, the replica is added as the 'replica' bind and
+# views decorated with @read_replica (dashboard, reports, lists) run their
+# SELECTs on it. Everything else stays on the primary:
+#   - flushes, INSERT/UPDATE/DELETE and SELECT ... FOR UPDATE, even inside a replica view
+#   - undecorated views and non-GET requests
+#   - read-your-writes: after any request that may have written (a non-GET/HEAD/OPTIONS
+#     request, or an explicit pin_to_primary()), the client's requests stay on the
+#     primary for DB_REPLICA_STICKY_SECONDS (a timestamp in the Flask session cookie)
+#   - a lagging or unreachable replica: ReplicaMonitor checks it at most every
+#     DB_REPLICA_CHECK_INTERVAL seconds and takes it out of rotation while its replay
+#     lag exceeds DB_REPLICA_MAX_LAG_SECONDS; a view that hits a connection error on
+#     the replica is retried once on the primary.
+#
+# Keep DB_REPLICA_STICKY_SECONDS above DB_REPLICA_MAX_LAG_SECONDS, so a user's own
+# writes have reached the replica once their reads go back to it (the report and
+# category caches are filled from whichever database served the read).
+#
+# Locally, any two databases can stand in for primary and replica, e.g.
+#     DATABASE_URL=sqlite:////tmp/pfm.db DATABASE_REPLICA_URL=sqlite:////tmp/pfm-replica.db
+# with the replica refreshed by copying the file. /diagnostics/pool shows the
+# replica's pool, lag and whether it is in use.
+
+import functools
+import logging
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import exc, text
+from sqlalchemy.engine import make_url
+
+import db_pool
+
+REPLICA_BIND = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+_STICKY_KEY = '_db_primary_until'
+
+# Replay lag in seconds; 0 when the standby has replayed everything it received
+# (an idle primary otherwise looks like a growing lag)
+_PG_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RoutingSession(Session):
+    """db.session class that sends plain SELECTs to the replica while a @read_replica view runs."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_request_context() and g.get('db_read_replica')
+                and getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaMonitor:
+    """Whether the replica is reachable and within the lag budget, rechecked at most every `check_interval` seconds."""
+
+    def __init__(self, max_lag=5, check_interval=5):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.in_use = None # Unknown until the first check
+        self.lag = None
+        self.error = None
+        self.checked_at = None # time.monotonic() of the last check
+        self._lock = threading.Lock()
+
+    def usable(self, engine):
+        if self.checked_at is None or time.monotonic() - self.checked_at >= self.check_interval:
+            # One thread checks; the others go by the previous result meanwhile
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._check(engine)
+                finally:
+                    self._lock.release()
+        return self.in_use
+
+    def _check(self, engine):
+        try:
+            with engine.connect() as conn:
+                if engine.dialect.name == 'postgresql':
+                    lag = float(conn.execute(_PG_LAG_SQL).scalar() or 0)
+                else:
+                    conn.execute(text('SELECT 1'))
+                    lag = 0.0
+        except exc.SQLAlchemyError as e:
+            self._set_state(False, None, str(e))
+        else:
+            in_use = lag <= self.max_lag
+            self._set_state(in_use, lag, None if in_use else f'Replica lag {lag:.1f}s > {self.max_lag:g}s')
+
+    def mark_down(self, error):
+        self._set_state(False, None, error)
+
+    def _set_state(self, in_use, lag, error):
+        if in_use != self.in_use:
+            if in_use:
+                logger.info('Read replica in use (lag %.1fs)', lag)
+            else:
+                logger.warning('Read replica out of use: %s', error)
+        self.in_use, self.lag, self.error = in_use, lag, error
+        self.checked_at = time.monotonic()
+
+    def status(self):
+        return {'in_use': self.in_use, 'lag_seconds': self.lag, 'error': self.error,
+                'max_lag_seconds': self.max_lag}
+
+
+def pin_to_primary(seconds=None):
+    """Keep this client's requests on the primary for `seconds` (DB_REPLICA_STICKY_SECONDS by default)."""
+    if 'db_replica' in current_app.extensions:
+        seconds = current_app.config['DB_REPLICA_STICKY_SECONDS'] if seconds is None else seconds
+        flask_session[_STICKY_KEY] = time.time() + seconds
+
+
+def _replica_allowed():
+    monitor = current_app.extensions.get('db_replica')
+    if monitor is None or request.method not in ('GET', 'HEAD'):
+        return False
+    if flask_session.get(_STICKY_KEY, 0) > time.time():
+        return False
+    return monitor.usable(current_app.extensions['sqlalchemy'].engines[REPLICA_BIND])
+
+
+def read_replica(view):
+    """Run a read-only view's SELECTs on the replica when it's configured, healthy and the client isn't pinned."""
+    @functools.wraps(view)
+    def wrapped(*args, **kwargs):
+        if not _replica_allowed():
+            return view(*args, **kwargs)
+        g.db_read_replica = True
+        try:
+            return view(*args, **kwargs)
+        except exc.OperationalError as e:
+            # The replica went away since the last check; the view only reads, so run it again on the primary
+            current_app.extensions['db_replica'].mark_down(str(e))
+            current_app.extensions['sqlalchemy'].session.rollback()
+            g.db_read_replica = False
+            return view(*args, **kwargs)
+    return wrapped
+
+
+def replica_status():
+    """The replica's pool and health for /diagnostics/pool, or None without a replica."""
+    monitor = current_app.extensions.get('db_replica')
+    if monitor is None:
+        return None
+    engine = current_app.extensions['sqlalchemy'].engines[REPLICA_BIND]
+    return {**monitor.status(), 'pool': db_pool.pool_stats(engine)}
+
+
+def _after_request(response):
+    if request.method not in SAFE_METHODS:
+        pin_to_primary() # Read-your-writes
+    return response
+
+
+def init_app(app):
+    """Add the replica bind from SQLALCHEMY_REPLICA_URI. Call before db.init_app."""
+    uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+    if not uri:
+        return
+    options = db_pool.engine_options(app.config, uri)
+    if make_url(uri).get_backend_name() == 'postgresql':
+        # Fail the health check quickly instead of hanging on an unreachable replica
+        options['connect_args'] = {**options.get('connect_args', {}),
+                                   'connect_timeout': app.config.get('DB_REPLICA_CONNECT_TIMEOUT', 2)}
+    app.config.setdefault('SQLALCHEMY_BINDS', {})[REPLICA_BIND] = {'url': uri, **options}
+    app.extensions['db_replica'] = ReplicaMonitor(
+        max_lag=app.config.get('DB_REPLICA_MAX_LAG_SECONDS', 5),
+        check_interval=app.config.get('DB_REPLICA_CHECK_INTERVAL', 5)
+    )
+    app.after_request(_after_request)
@@ -0,0 +1,77 @@
+# personal_finance_manager_web/exports.py
+#
+# Streaming CSV / NDJSON export of a user's ledger.
+#
+# Rows come from the read_models.transaction_rows projection (category name
+# joined in) over a server-side cursor (`stream_results` + `yield_per`), and are
+# encoded and yielded in batches, so a worker only ever holds one batch in
+# memory however many years of transactions are exported.
+
+import csv
+import io
+import json
+
+from models import Transaction
+import read_models
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+EXPORT_FIELDS = ('date', 'type', 'category', 'description', 'amount')
+EXPORT_BATCH_SIZE = 1000 # Rows fetched per round-trip and encoded per yielded chunk
+
+
+def export_rows(user_id, first_day=None, last_day=None):
+    """The user's transactions, oldest first, as a stream of TransactionRow-shaped rows."""
+    query = read_models.transaction_rows(user_id)
+    if first_day:
+        query = query.filter(Transaction.date >= first_day)
+    if last_day:
+        query = query.filter(Transaction.date <= last_day)
+    return query.order_by(Transaction.date, Transaction.id) \
+        .execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+
+
+def _spreadsheet_safe(value):
+    # Spreadsheet apps evaluate cells starting with these characters as formulas
+    if value and value[0] in '=+-@\t\r':
+        return "'" + value
+    return value
+
+
+def csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for i, row in enumerate(rows, 1):
+        writer.writerow((
+            row.date.isoformat(), row.type, _spreadsheet_safe(row.category_name),
+            _spreadsheet_safe(row.description or ''), f'{row.amount:.2f}'
+        ))
+        if i % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def ndjson_chunks(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({
+            'date': row.date.isoformat(),
+            'type': row.type,
+            'category': row.category_name,
+            'description': row.description,
+            'amount': f'{row.amount:.2f}', # String keeps the exact decimal value
+        }, ensure_ascii=False))
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def export_chunks(export_format, rows):
+    return csv_chunks(rows) if export_format == 'csv' else ndjson_chunks(rows)
@@ -0,0 +1,294 @@
+# personal_finance_manager_web/importer.py
+#
+# Bulk bank-statement import (CSV and OFX/QFX).
+#
+# The upload is parsed as a stream, one record at a time. Records are validated
+# in batches against a category name -> (id, type) dictionary loaded once per
+# import, and each batch of valid rows is written with a single multi-row
+# INSERT (executemany), or COPY on PostgreSQL/psycopg2, instead of one ORM
+# add/flush per row. Invalid rows are skipped and reported with their line number.
+#
+# Core inserts bypass the ORM flush, so the rollup tables and the report cache
+# are updated explicitly: rollups.apply_deltas per batch and
+# report_cache.mark_user_dirty for the commit.
+
+import csv
+import io
+import re
+import unicodedata
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+
+from database import db
+from models import Category, Transaction
+import report_cache
+import rollups
+
+IMPORT_FORMATS = ('csv', 'ofx')
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y')
+MAX_REPORTED_ERRORS = 500
+MAX_AMOUNT = Decimal('100000000') # Transaction.amount is Numeric(10, 2)
+
+_INSERT_COLUMNS = ('user_id', 'amount', 'description', 'date', 'type', 'category_id', 'created_at', 'updated_at')
+
+
+class ImportResult:
+    __slots__ = ('imported', 'error_count', 'errors')
+
+    def __init__(self):
+        self.imported = 0
+        self.error_count = 0
+        self.errors = [] # (line number, message), at most MAX_REPORTED_ERRORS
+
+    def add_error(self, line_no, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_no, message))
+
+
+def detect_format(filename):
+    """'csv' or 'ofx' from the uploaded file's extension, or None."""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        return 'csv'
+    if extension in ('ofx', 'qfx'):
+        return 'ofx'
+    return None
+
+
+# --- Parsers: yield (line number, {'date', 'amount', 'type', 'category', 'description'}) ---
+
+def parse_csv(text_stream):
+    """Rows of a CSV with a header naming at least date, amount and category.
+
+    `type` (income/expense) and `description` columns are optional; without a
+    type column, negative amounts (including accounting-style "(45.00)") are
+    expenses and positive ones income.
+    """
+    reader = csv.DictReader(text_stream)
+    if reader.fieldnames is None:
+        return
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    missing = {'date', 'amount', 'category'} - set(reader.fieldnames)
+    if missing:
+        raise ValueError(f'CSV header is missing: {", ".join(sorted(missing))}')
+    for record in reader:
+        yield reader.line_num, {
+            'date': record.get('date'),
+            'amount': record.get('amount'),
+            'type': record.get('type'),
+            'category': record.get('category'),
+            'description': record.get('description'),
+        }
+
+
+_OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def _ofx_tags(text_stream, chunk_size=64 * 1024):
+    # (line number, closing?, TAG, value) for every tag, read chunk by chunk.
+    # OFX 1.x is SGML (leaf tags are not closed), OFX 2.x is XML; both fit this pattern.
+    line_no = 1
+    buffer = ''
+    while True:
+        chunk = text_stream.read(chunk_size)
+        buffer += chunk
+        # Keep a possibly incomplete trailing tag for the next chunk
+        cut = buffer.rfind('<') if chunk else -1
+        if cut == -1:
+            cut = len(buffer)
+        consumed = 0
+        for match in _OFX_TAG.finditer(buffer, 0, cut):
+            line_no += buffer.count('\n', consumed, match.start())
+            consumed = match.start()
+            yield line_no, match.group(1) == '/', match.group(2).upper(), match.group(3).strip()
+        line_no += buffer.count('\n', consumed, cut)
+        buffer = buffer[cut:]
+        if not chunk:
+            return
+
+
+def parse_ofx(text_stream):
+    """<STMTTRN> records of an OFX/QFX statement. OFX has no categories; the
+    import form's default categories are used for them."""
+    record = None
+    for line_no, closing, tag, value in _ofx_tags(text_stream):
+        if tag == 'STMTTRN':
+            if closing and record is not None:
+                yield record.pop('line'), record
+                record = None
+            elif not closing:
+                record = {'line': line_no, 'date': None, 'amount': None, 'type': None, 'category': None, 'description': None}
+        elif record is not None and not closing:
+            if tag == 'DTPOSTED':
+                record['date'] = value[:8] # YYYYMMDD[HHMMSS[.XXX]][[TZ]]
+            elif tag == 'TRNAMT':
+                record['amount'] = value
+            elif tag in ('NAME', 'MEMO') and value:
+                record['description'] = f"{record['description']} - {value}" if record['description'] else value
+
+
+# --- Validation ---
+
+def _parse_date(value):
+    value = (value or '').strip()
+    try:
+        # Fast paths for the common fixed-width layouts (strptime dominates large imports)
+        if len(value) == 10 and value[4] == '-':
+            return date.fromisoformat(value)
+        if len(value) == 10 and value[2] == value[5] and value[2] in '/-':
+            return date(int(value[6:]), int(value[3:5]), int(value[:2]))
+        if len(value) == 8 and value.isdigit(): # OFX YYYYMMDD
+            return date(int(value[:4]), int(value[4:6]), int(value[6:]))
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS: # e.g. unpadded 5/1/2024
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            pass
+    raise ValueError(f'unrecognised date "{value}"')
+
+
+# Optional sign, digits with optional comma thousands groups, optional . and decimals
+_AMOUNT_RE = re.compile(r'([+-]?)(\d{1,3}(?:,\d{3})+|\d*)(?:\.(\d*))?')
+_CURRENCY_CODE_RE = re.compile(r'^[A-Z]{3}\s*|\s*[A-Z]{3}$')
+
+
+def _parse_amount(value):
+    """Statement amount as a Decimal; '(45.00)' is negative. Raises ValueError rather than guess."""
+    text = (value or '').strip()
+    negative = text.startswith('(') and text.endswith(')') # Accounting notation
+    if negative:
+        text = text[1:-1]
+    # Drop currency symbols and codes ($, €, USD), nothing else
+    text = _CURRENCY_CODE_RE.sub('', text)
+    text = ''.join(c for c in text if unicodedata.category(c) != 'Sc').strip()
+    match = _AMOUNT_RE.fullmatch(text)
+    if match is None or not (match.group(2) or match.group(3)):
+        if ',' in text:
+            raise ValueError(f'amount "{value}" looks like it uses a decimal comma or an unsupported digit grouping')
+        raise ValueError(f'invalid amount "{value}"')
+    sign, whole, decimals = match.groups()
+    if negative and sign:
+        raise ValueError(f'invalid amount "{value}"')
+    if decimals and len(decimals) > 2:
+        raise ValueError(f'amount "{value}" has more than 2 decimal places')
+    amount = Decimal(f"{whole.replace(',', '') or '0'}.{decimals or '0'}")
+    if negative or sign == '-':
+        amount = -amount
+    if amount == 0 or abs(amount) >= MAX_AMOUNT:
+        raise ValueError(f'invalid amount "{value}"')
+    return amount.quantize(Decimal('0.01'))
+
+
+def load_category_map(user_id):
+    """{lower-cased category name: (id, type)} for the user, in one query."""
+    return {
+        name.lower(): (category_id, category_type)
+        for category_id, name, category_type in db.session.query(Category.id, Category.name, Category.type)
+            .filter(Category.user_id == user_id)
+    }
+
+
+def validate(record, categories, default_categories):
+    """Transaction column values for a parsed record. Raises ValueError with a reason."""
+    txn_date = _parse_date(record['date'])
+    amount = _parse_amount(record['amount'])
+
+    txn_type = (record['type'] or '').strip().lower()
+    if not txn_type:
+        txn_type = 'expense' if amount < 0 else 'income'
+    elif txn_type not in ('income', 'expense'):
+        raise ValueError(f'invalid type "{record["type"]}"')
+
+    category_name = (record['category'] or '').strip()
+    if category_name:
+        category = categories.get(category_name.lower())
+        if category is None:
+            raise ValueError(f'unknown category "{category_name}"')
+    else:
+        category = default_categories.get(txn_type)
+        if category is None:
+            raise ValueError(f'no category given and no default {txn_type} category selected')
+    category_id, category_type = category
+    if category_type != txn_type:
+        raise ValueError(f'category "{category_name}" is an {category_type} category, not {txn_type}')
+
+    description = (record['description'] or '').strip() or None
+    return txn_date, abs(amount), txn_type, category_id, description
+
+
+# --- Writing ---
+
+def _copy_rows(session, rows):
+    """COPY rows into transactions. Returns False if the driver can't COPY."""
+    cursor = session.connection().connection.cursor()
+    if not hasattr(cursor, 'copy_expert'): # psycopg2 API
+        cursor.close()
+        return False
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['' if row[c] is None else row[c] for c in _INSERT_COLUMNS])
+    buffer.seek(0)
+    try:
+        cursor.copy_expert(
+            f'COPY transactions ({", ".join(_INSERT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)', buffer
+        )
+    finally:
+        cursor.close()
+    return True
+
+
+def write_batch(session, rows):
+    if session.get_bind().dialect.name == 'postgresql' and _copy_rows(session, rows):
+        return
+    session.execute(Transaction.__table__.insert(), rows) # executemany / multi-row VALUES
+
+
+def import_statement(user_id, records, default_categories=None, batch_size=5000):
+    """Validate and insert parsed `records`, committing once at the end.
+
+    `default_categories` maps 'income'/'expense' to a category id for records
+    without a category. Returns an ImportResult.
+    """
+    session = db.session
+    result = ImportResult()
+    categories = load_category_map(user_id)
+    by_id = {category_id: (category_id, category_type) for category_id, category_type in categories.values()}
+    default_categories = {
+        txn_type: by_id[category_id]
+        for txn_type, category_id in (default_categories or {}).items()
+        if category_id in by_id
+    }
+    now = datetime.utcnow()
+
+    def flush_batch(rows, deltas):
+        if rows:
+            write_batch(session, rows)
+            rollups.apply_deltas(session, {key: delta for key, delta in deltas.items() if delta})
+            result.imported += len(rows)
+
+    rows, deltas = [], defaultdict(Decimal)
+    for line_no, record in records:
+        try:
+            txn_date, amount, txn_type, category_id, description = validate(record, categories, default_categories)
+        except ValueError as e:
+            result.add_error(line_no, str(e))
+            continue
+        rows.append({
+            'user_id': user_id, 'amount': amount, 'description': description, 'date': txn_date,
+            'type': txn_type, 'category_id': category_id, 'created_at': now, 'updated_at': now
+        })
+        deltas[(user_id, txn_date, txn_type, category_id)] += amount
+        if len(rows) >= batch_size:
+            flush_batch(rows, deltas)
+            rows, deltas = [], defaultdict(Decimal)
+    flush_batch(rows, deltas)
+
+    if result.imported:
+        report_cache.mark_user_dirty(session, user_id)
+    session.commit()
+    return result
@@ -51,6 +51,20 @@ def get_metadata():
     return target_db.metadata
 
 
+def include_name(name, type_, parent_names):
+    # The full-text search structures of search.py (created by migration 3d8c5f1b7e92)
+    # aren't in the models' metadata; without this, autogenerate would drop them.
+    # SQLite: the transaction_search FTS5 table and its shadow tables
+    if type_ == 'table':
+        return not name.startswith('transaction_search')
+    # PostgreSQL: the generated tsvector column and its GIN index
+    if type_ == 'column':
+        return not (parent_names.get('table_name') == 'transactions' and name == 'search_vector')
+    if type_ == 'index':
+        return name != 'ix_transactions_search_vector'
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +79,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_name=include_name
     )
 
     with context.begin_transaction():
@@ -93,10 +108,17 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_name", include_name)
 
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        if connection.dialect.name == 'sqlite':
+            # Batch operations recreate tables; with foreign keys enforced (see
+            # db_pool.py), dropping the old table would cascade to referencing rows
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            connection.commit()
+
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
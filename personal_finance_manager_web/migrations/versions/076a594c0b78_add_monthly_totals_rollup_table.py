@@ -0,0 +1,34 @@
+"""Add monthly_totals rollup table
+
+Revision ID: 076a594c0b78
+Revises: 25f9d8b38f57
+Create Date: 2026-10-17 09:12:44.218310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '076a594c0b78'
+down_revision = '25f9d8b38f57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('monthly_totals',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('type', sa.String(length=10), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'month', 'type', 'category_id')
+    )
+    # The table starts empty; populate it with `flask rebuild-monthly-totals`.
+
+
+def downgrade():
+    op.drop_table('monthly_totals')
@@ -1,17 +1,16 @@
 """Add category_name to Budget model
 
 Revision ID: 25f9d8b38f57
-Revises: 
+Revises: 1f0c3b7a9d52
 Create Date: 2025-06-05 20:01:04.017511
 
 """
 from alembic import op
 import sqlalchemy as sa
-from sqlalchemy.dialects import postgresql
 
 # revision identifiers, used by Alembic.
 revision = '25f9d8b38f57'
-down_revision = None
+down_revision = '1f0c3b7a9d52'
 branch_labels = None
 depends_on = None
 
@@ -21,11 +20,11 @@ def upgrade():
     with op.batch_alter_table('budgets', schema=None) as batch_op:
         batch_op.add_column(sa.Column('category_name', sa.String(length=100), nullable=False))
         batch_op.alter_column('start_date',
-               existing_type=postgresql.TIMESTAMP(),
+               existing_type=sa.TIMESTAMP(),
                type_=sa.Date(),
                existing_nullable=False)
         batch_op.alter_column('end_date',
-               existing_type=postgresql.TIMESTAMP(),
+               existing_type=sa.TIMESTAMP(),
                type_=sa.Date(),
                existing_nullable=True)
         batch_op.create_unique_constraint('_user_category_start_date_uc', ['user_id', 'category_name', 'start_date'])
@@ -51,11 +50,11 @@ def downgrade():
         batch_op.drop_constraint('_user_category_start_date_uc', type_='unique')
         batch_op.alter_column('end_date',
                existing_type=sa.Date(),
-               type_=postgresql.TIMESTAMP(),
+               type_=sa.TIMESTAMP(),
                existing_nullable=True)
         batch_op.alter_column('start_date',
                existing_type=sa.Date(),
-               type_=postgresql.TIMESTAMP(),
+               type_=sa.TIMESTAMP(),
                existing_nullable=False)
         batch_op.drop_column('category_name')
 
@@ -0,0 +1,70 @@
+"""Add full-text search over transaction descriptions
+
+Revision ID: 3d8c5f1b7e92
+Revises: 9f3b2d6e1a47
+Create Date: 2026-10-17 16:21:37.402918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d8c5f1b7e92'
+down_revision = '9f3b2d6e1a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # The generated column is computed for existing rows as it is added
+        op.execute(
+            "ALTER TABLE transactions ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(description, ''))) STORED"
+        )
+        op.execute("CREATE INDEX ix_transactions_search_vector ON transactions USING gin (search_vector)")
+    elif dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE transaction_search USING fts5(description, category)")
+        op.execute("""
+            CREATE TRIGGER transactions_search_insert AFTER INSERT ON transactions BEGIN
+                INSERT INTO transaction_search (rowid, description, category)
+                VALUES (new.id, new.description, (SELECT name FROM categories WHERE id = new.category_id));
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER transactions_search_update AFTER UPDATE OF description, category_id ON transactions BEGIN
+                UPDATE transaction_search
+                SET description = new.description, category = (SELECT name FROM categories WHERE id = new.category_id)
+                WHERE rowid = new.id;
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER transactions_search_delete AFTER DELETE ON transactions BEGIN
+                DELETE FROM transaction_search WHERE rowid = old.id;
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER categories_search_rename AFTER UPDATE OF name ON categories BEGIN
+                UPDATE transaction_search SET category = new.name
+                WHERE rowid IN (SELECT id FROM transactions WHERE category_id = new.id);
+            END
+        """)
+        op.execute("""
+            INSERT INTO transaction_search (rowid, description, category)
+            SELECT transactions.id, transactions.description, categories.name
+            FROM transactions JOIN categories ON categories.id = transactions.category_id
+        """)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX ix_transactions_search_vector")
+        op.execute("ALTER TABLE transactions DROP COLUMN search_vector")
+    elif dialect == 'sqlite':
+        for trigger in ('transactions_search_insert', 'transactions_search_update',
+                        'transactions_search_delete', 'categories_search_rename'):
+            op.execute(f"DROP TRIGGER {trigger}")
+        op.execute("DROP TABLE transaction_search")
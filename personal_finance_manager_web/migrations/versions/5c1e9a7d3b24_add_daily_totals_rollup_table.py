@@ -0,0 +1,34 @@
+"""Add daily_totals rollup table
+
+Revision ID: 5c1e9a7d3b24
+Revises: 076a594c0b78
+Create Date: 2026-10-17 13:40:02.517734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e9a7d3b24'
+down_revision = '076a594c0b78'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_totals',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('type', sa.String(length=10), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'day', 'type', 'category_id')
+    )
+    # The table starts empty; populate it with `flask rebuild-daily-totals`.
+
+
+def downgrade():
+    op.drop_table('daily_totals')
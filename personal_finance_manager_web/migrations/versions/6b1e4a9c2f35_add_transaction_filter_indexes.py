@@ -0,0 +1,40 @@
+"""Add composite indexes for the filtered transaction browser
+
+Revision ID: 6b1e4a9c2f35
+Revises: 3d8c5f1b7e92
+Create Date: 2026-10-17 18:41:07.512903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1e4a9c2f35'
+down_revision = '3d8c5f1b7e92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_transactions_user_type_date', 'transactions',
+        ['user_id', 'type', 'date', 'created_at', 'id'],
+        unique=False
+    )
+    op.create_index(
+        'ix_transactions_user_category_date', 'transactions',
+        ['user_id', 'category_id', 'date'],
+        unique=False
+    )
+    op.create_index(
+        'ix_transactions_user_amount', 'transactions',
+        ['user_id', 'amount', 'id'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_transactions_user_amount', table_name='transactions')
+    op.drop_index('ix_transactions_user_category_date', table_name='transactions')
+    op.drop_index('ix_transactions_user_type_date', table_name='transactions')
@@ -0,0 +1,95 @@
+"""Link budgets to categories by id instead of name
+
+Revision ID: 8c3f5a1d2e64
+Revises: 6b1e4a9c2f35
+Create Date: 2026-10-17 19:26:53.140287
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c3f5a1d2e64'
+down_revision = '6b1e4a9c2f35'
+branch_labels = None
+depends_on = None
+
+
+CATEGORY_NAME_LENGTH = 50 # categories.name; budgets.category_name allowed 100
+
+
+def _category_name(name, taken):
+    """`name` cut to fit categories.name, with a "~2", "~3"... suffix if that is taken."""
+    candidate = name[:CATEGORY_NAME_LENGTH]
+    number = 1
+    while candidate in taken:
+        number += 1
+        suffix = f'~{number}'
+        candidate = name[:CATEGORY_NAME_LENGTH - len(suffix)] + suffix
+    taken.add(candidate)
+    return candidate
+
+
+def _recreate_missing_categories(conn):
+    # Budgets whose category was renamed or deleted no longer match any category
+    # by name; recreate those categories so the budgets keep their history. Names
+    # longer than categories.name are shortened, and kept unique per user.
+    missing = conn.execute(sa.text(
+        "SELECT DISTINCT user_id, category_name FROM budgets WHERE category_id IS NULL ORDER BY user_id, category_name"
+    )).all()
+    taken = {}
+    for user_id, budget_name in missing:
+        if user_id not in taken:
+            taken[user_id] = set(conn.execute(
+                sa.text("SELECT name FROM categories WHERE user_id = :user_id"), {'user_id': user_id}
+            ).scalars())
+        name = _category_name(budget_name, taken[user_id])
+        conn.execute(sa.text(
+            "INSERT INTO categories (user_id, name, type, created_at, updated_at) "
+            "VALUES (:user_id, :name, 'expense', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+        ), {'user_id': user_id, 'name': name})
+        conn.execute(sa.text(
+            "UPDATE budgets SET category_id = (SELECT id FROM categories WHERE user_id = :user_id AND name = :name) "
+            "WHERE user_id = :user_id AND category_name = :budget_name"
+        ), {'user_id': user_id, 'name': name, 'budget_name': budget_name})
+
+
+def upgrade():
+    with op.batch_alter_table('budgets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('category_id', sa.Integer(), nullable=True))
+
+    op.execute("""
+        UPDATE budgets SET category_id = (
+            SELECT c.id FROM categories c
+            WHERE c.user_id = budgets.user_id AND c.name = budgets.category_name
+        )
+    """)
+    _recreate_missing_categories(op.get_bind())
+
+    with op.batch_alter_table('budgets', schema=None) as batch_op:
+        batch_op.alter_column('category_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_constraint('_user_category_start_date_uc', type_='unique')
+        batch_op.create_unique_constraint('_user_category_start_date_uc', ['user_id', 'category_id', 'start_date'])
+        batch_op.create_foreign_key('budgets_category_id_fkey', 'categories', ['category_id'], ['id'])
+        batch_op.create_index(batch_op.f('ix_budgets_category_id'), ['category_id'], unique=False)
+        batch_op.drop_column('category_name')
+
+
+def downgrade():
+    with op.batch_alter_table('budgets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('category_name', sa.String(length=100), nullable=True))
+
+    op.execute("""
+        UPDATE budgets SET category_name = (
+            SELECT c.name FROM categories c WHERE c.id = budgets.category_id
+        )
+    """)
+
+    with op.batch_alter_table('budgets', schema=None) as batch_op:
+        batch_op.alter_column('category_name', existing_type=sa.String(length=100), nullable=False)
+        batch_op.drop_constraint('_user_category_start_date_uc', type_='unique')
+        batch_op.create_unique_constraint('_user_category_start_date_uc', ['user_id', 'category_name', 'start_date'])
+        batch_op.drop_index(batch_op.f('ix_budgets_category_id'))
+        batch_op.drop_constraint('budgets_category_id_fkey', type_='foreignkey')
+        batch_op.drop_column('category_id')
@@ -0,0 +1,28 @@
+"""Add transactions keyset pagination index
+
+Revision ID: 9f3b2d6e1a47
+Revises: 5c1e9a7d3b24
+Create Date: 2026-10-17 15:02:19.884105
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9f3b2d6e1a47'
+down_revision = '5c1e9a7d3b24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_transactions_user_date_created_id', 'transactions',
+        ['user_id', sa.text('date DESC'), sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_transactions_user_date_created_id', table_name='transactions')
@@ -0,0 +1,39 @@
+"""Add budget_progress table
+
+Revision ID: a4d7c2e9f813
+Revises: 8c3f5a1d2e64
+Create Date: 2026-10-17 20:03:38.675120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d7c2e9f813'
+down_revision = '8c3f5a1d2e64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('budget_progress',
+    sa.Column('budget_id', sa.Integer(), nullable=False),
+    sa.Column('spent', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['budget_id'], ['budgets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('budget_id')
+    )
+    # Backfill; `flask rebuild-budget-progress` does the same later if needed.
+    op.execute("""
+        INSERT INTO budget_progress (budget_id, spent)
+        SELECT b.id, COALESCE(SUM(t.amount), 0)
+        FROM budgets b
+        LEFT JOIN transactions t
+            ON t.user_id = b.user_id AND t.category_id = b.category_id AND t.type = 'expense'
+            AND t.date >= b.start_date AND (b.end_date IS NULL OR t.date <= b.end_date)
+        GROUP BY b.id
+    """)
+
+
+def downgrade():
+    op.drop_table('budget_progress')
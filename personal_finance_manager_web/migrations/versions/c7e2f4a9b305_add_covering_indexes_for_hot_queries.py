@@ -0,0 +1,63 @@
+"""Add covering indexes for transaction aggregates and category lookups
+
+Revision ID: c7e2f4a9b305
+Revises: a4d7c2e9f813
+Create Date: 2026-10-17 21:12:44.301857
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2f4a9b305'
+down_revision = 'a4d7c2e9f813'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, INCLUDE columns - PostgreSQL only)
+NEW_INDEXES = [
+    ('ix_transactions_user_type_date_cov', 'transactions',
+     ['user_id', 'type', 'date', 'created_at', 'id'], ['amount', 'category_id']),
+    ('ix_transactions_user_category_date_cov', 'transactions',
+     ['user_id', 'category_id', 'date'], ['type', 'amount']),
+    ('ix_daily_totals_user_category', 'daily_totals',
+     ['user_id', 'category_id', 'day'], ['type', 'total']),
+    ('ix_monthly_totals_user_category', 'monthly_totals',
+     ['user_id', 'category_id'], []),
+]
+
+# Superseded by the covering versions above (same key columns)
+REPLACED_INDEXES = [
+    ('ix_transactions_user_type_date', 'transactions', ['user_id', 'type', 'date', 'created_at', 'id']),
+    ('ix_transactions_user_category_date', 'transactions', ['user_id', 'category_id', 'date']),
+]
+
+
+# PostgreSQL builds these with CREATE INDEX CONCURRENTLY, which doesn't block writes
+# to the table while it scans it but can't run inside a transaction, hence the
+# autocommit block. A concurrent build that fails (deadlock, cancel, statement
+# timeout - run this with DB_STATEMENT_TIMEOUT_MS=0 on large tables) leaves an
+# INVALID index behind; dropping it first makes the migration safe to re-run.
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, include in NEW_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_include=include, postgresql_concurrently=True
+            )
+        # Only dropped once their replacements are in place
+        for name, table, columns in REPLACED_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+        for name, table, columns, include in reversed(NEW_INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
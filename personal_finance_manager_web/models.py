@@ -2,7 +2,7 @@
 
 from database import db
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+import password_hashing
 from datetime import datetime
 
 # Base model for common fields like ID and creation/update timestamps
@@ -33,13 +33,16 @@ class User(UserMixin, Base):
     def get_id(self):
         return str(self.id)
 
+    # Hashing runs on the bounded executor in password_hashing.py (scrypt, PASSWORD_HASH_METHOD);
+    # both may raise password_hashing.PasswordHashingBusy under load
     def set_password(self, password):
-        # Using scrypt for modern password hashing (requires 'passlib[scrypt]' installed)
-        # pip install passlib[scrypt]
-        self.password_hash = generate_password_hash(password, method='scrypt')
+        self.password_hash = password_hashing.hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hashing.verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return password_hashing.needs_rehash(self.password_hash)
 
 
 # --- Category Model ---
@@ -53,10 +56,8 @@ class Category(Base):
     __table_args__ = (db.UniqueConstraint('user_id', 'name', name='_user_name_uc'),)
 
     transactions = db.relationship('Transaction', backref='category', lazy=True)
-
-    # If you choose to link Budget to Category via a foreign key (see Budget model below),
-    # you might add a backref here if needed:
-    # budgets_associated = db.relationship('Budget', backref='associated_category', lazy=True)
+    # A budget is meaningless without its category, so they are deleted with it
+    budgets = db.relationship('Budget', backref='category', lazy=True, cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Category {self.name} (Type: {self.type}, User: {self.user_id})>"
@@ -77,6 +78,30 @@ class Transaction(Base):
     def __repr__(self):
         return f"<Transaction {self.type}: {self.amount} on {self.date} (Category: {self.category.name if self.category else 'N/A'})>"
 
+# Serves the transaction lists' keyset pagination (see pagination.py): the
+# user's rows in (date, created_at, id) DESC order, read as one index range scan.
+db.Index(
+    'ix_transactions_user_date_created_id',
+    Transaction.user_id, Transaction.date.desc(), Transaction.created_at.desc(), Transaction.id.desc()
+)
+
+# Composite indexes for the filtered transaction browser (read_models.TransactionFilter):
+# type filter + date order, category filter + date range, amount range / amount order.
+# On PostgreSQL the first two also carry (INCLUDE) the remaining columns that the
+# aggregates over transactions read, so the rollup rebuilds and budget spend sums
+# (rollups.py) are index-only scans instead of heap lookups per row.
+db.Index(
+    'ix_transactions_user_type_date_cov',
+    Transaction.user_id, Transaction.type, Transaction.date, Transaction.created_at, Transaction.id,
+    postgresql_include=['amount', 'category_id']
+)
+db.Index(
+    'ix_transactions_user_category_date_cov',
+    Transaction.user_id, Transaction.category_id, Transaction.date,
+    postgresql_include=['type', 'amount']
+)
+db.Index('ix_transactions_user_amount', Transaction.user_id, Transaction.amount, Transaction.id)
+
 
 # --- Budget Model ---
 class Budget(Base):
@@ -86,33 +111,62 @@ class Budget(Base):
     start_date = db.Column(db.Date, nullable=False, default=datetime.utcnow().date()) # Changed to Date for consistency
     end_date = db.Column(db.Date, nullable=True) # Changed to Date for consistency, nullable=True for open-ended budgets
 
-    # --- CHOOSE ONE OF THE FOLLOWING TWO APPROACHES FOR CATEGORY LINKING ---
+    # Linked by id, so budgets follow category renames and spend queries join on integers
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False, index=True)
+
+    # Prevent duplicate budgets for the same user, category and start date
+    __table_args__ = (db.UniqueConstraint('user_id', 'category_id', 'start_date', name='_user_category_start_date_uc'),)
 
-    # APPROACH 1: Store category name as a string (YOUR CURRENT IMPLEMENTATION)
-    # Pros: Simpler, no strict foreign key constraint.
-    # Cons: No direct relational integrity; if category name changes, budgets aren't updated.
-    #       Cannot easily query Category object from Budget directly.
-    category_name = db.Column(db.String(100), nullable=False) # Renamed to 'category_name' for clarity
 
-    # APPROACH 2: Link to Category via Foreign Key (RECOMMENDED FOR RELATIONAL INTEGRITY)
-    # Pros: Enforces referential integrity; can easily navigate to Category object.
-    # Cons: Requires careful handling of Category deletions (though cascade='all, delete-orphan' helps).
-    #
-    # If you choose this, UNCOMMENT the lines below and COMMENT OUT 'category_name' above.
-    # category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
-    # associated_category = db.relationship('Category', backref='budgets_link', lazy=True) # Rename backref if needed
+    def __repr__(self):
+        return f"<Budget for {self.category.name if self.category else 'N/A'} (User: {self.user_id}, Amount: {self.amount})>"
+
+# --- MonthlyTotal Model (rollup of Transaction amounts) ---
+# One row per (user, month, type, category) holding the summed transaction amount.
+# Maintained incrementally by rollups.py whenever transactions are flushed, so the
+# dashboard and reports never have to SUM over the raw transactions table.
+class MonthlyTotal(db.Model):
+    __tablename__ = 'monthly_totals'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True) # Always the first day of the month
+    type = db.Column(db.String(10), primary_key=True) # 'income' or 'expense'
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True)
+    total = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+    # Category merges/deletes (category_merge.py) address a user's rows by category
+    __table_args__ = (db.Index('ix_monthly_totals_user_category', 'user_id', 'category_id'),)
+
+    def __repr__(self):
+        return f"<MonthlyTotal {self.type} {self.month:%Y-%m} (User: {self.user_id}, Category: {self.category_id}): {self.total}>"
+
+# --- DailyTotal Model (per-day rollup of Transaction amounts) ---
+# Same shape as MonthlyTotal at day granularity. Reports over arbitrary date
+# ranges read whole months from monthly_totals and only the partial months at
+# either end of the range from here (see report_engine.Ledger.load).
+class DailyTotal(db.Model):
+    __tablename__ = 'daily_totals'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    type = db.Column(db.String(10), primary_key=True) # 'income' or 'expense'
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True)
+    total = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+    # Category merges/deletes read a category's daily rows as rollup deltas
+    __table_args__ = (
+        db.Index('ix_daily_totals_user_category', 'user_id', 'category_id', 'day', postgresql_include=['type', 'total']),
+    )
 
-    # Add a unique constraint to prevent duplicate budgets for the same user, category, and time period
-    # This might need adjustment based on how precise your budget periods are.
-    # For example, a user shouldn't have two 'Groceries' budgets for the exact same month.
-    # __table_args__ = (db.UniqueConstraint('user_id', 'category_id', 'start_date', name='_user_category_date_uc'),)
-    # (If using category_name, replace category_id with category_name in the unique constraint)
-    __table_args__ = (db.UniqueConstraint('user_id', 'category_name', 'start_date', name='_user_category_start_date_uc'),)
+    def __repr__(self):
+        return f"<DailyTotal {self.type} {self.day:%Y-%m-%d} (User: {self.user_id}, Category: {self.category_id}): {self.total}>"
 
+# --- BudgetProgress Model (spent-to-date per budget) ---
+# Expense total in the budget's category between its start_date and end_date
+# (open-ended when end_date is NULL). Kept current by rollups.py as transactions
+# and budgets are written, so budget pages read spend without summing transactions.
+class BudgetProgress(db.Model):
+    __tablename__ = 'budget_progress'
+    budget_id = db.Column(db.Integer, db.ForeignKey('budgets.id', ondelete='CASCADE'), primary_key=True)
+    spent = db.Column(db.Numeric(12, 2), nullable=False, default=0)
 
     def __repr__(self):
-        # Adjust repr based on chosen category linking approach
-        # If using category_name:
-        return f"<Budget for {self.category_name} (User: {self.user_id}, Amount: {self.amount})>"
-        # If using category_id and associated_category:
-        # return f"<Budget for {self.associated_category.name if self.associated_category else 'N/A'} (User: {self.user_id}, Amount: {self.amount})>"
\ No newline at end of file
+        return f"<BudgetProgress (Budget: {self.budget_id}): {self.spent}>"
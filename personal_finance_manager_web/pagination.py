@@ -0,0 +1,148 @@
+# personal_finance_manager_web/pagination.py
+#
+# Keyset (cursor) pagination for the transaction lists.
+#
+# OFFSET pagination makes the database read and throw away every row before
+# the requested page. Instead, each page boundary is remembered as the sort key
+# of its last (or first) row, and the next page is fetched with a row-value
+# comparison on that key:
+#
+#   WHERE user_id = :u AND (date, created_at, id) < (:date, :created_at, :id)
+#   ORDER BY date DESC, created_at DESC, id DESC
+#   LIMIT :per_page + 1
+#
+# which the ix_transactions_user_date_created_id index answers with one range scan,
+# whatever page the user is on. Cursors are opaque url-safe tokens.
+
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from flask import request, url_for
+from sqlalchemy import literal, tuple_
+
+from models import Transaction
+
+# Newest first; `id` makes the key unique so no row is skipped or repeated
+TRANSACTION_SORT_KEY = (Transaction.date, Transaction.created_at, Transaction.id)
+MAX_PER_PAGE = 200
+
+
+class KeysetPage:
+    __slots__ = ('items', 'next_cursor', 'prev_cursor', 'per_page')
+
+    def __init__(self, items, next_cursor, prev_cursor, per_page):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.per_page = per_page
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def _encode_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(column, value):
+    # bool is an int subclass, and None/lists/objects never come from encode_cursor
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f'unexpected {type(value).__name__} value')
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    value = python_type(value)
+    if isinstance(value, Decimal) and not value.is_finite():
+        raise ValueError('non-finite number')
+    return value
+
+
+def encode_cursor(row, sort_key):
+    values = [_encode_value(getattr(row, column.key)) for column in sort_key]
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort_key):
+    """Sort-key values from a cursor token. Raises ValueError if the token is malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(sort_key):
+            raise ValueError('wrong number of values')
+        return tuple(_decode_value(column, value) for column, value in zip(sort_key, values))
+    except (TypeError, ValueError, InvalidOperation) as e: # JSON, base64 and UTF-8 errors are ValueErrors
+        raise ValueError(f'Invalid page cursor: {e}')
+
+
+def _cursor_key(token, sort_key):
+    # Bind each value with its column's type so dates compare the way the column stores them
+    values = decode_cursor(token, sort_key)
+    return tuple_(*(literal(value, column.type) for column, value in zip(sort_key, values)))
+
+
+def page_size(requested, default):
+    """Clamp a user-supplied ?per_page= value to [1, MAX_PER_PAGE]."""
+    if not requested:
+        return default
+    return max(1, min(requested, MAX_PER_PAGE))
+
+
+def pager_url(**cursor):
+    """URL of the current page's endpoint and query string with a different cursor
+    (after= or before=), for the Newer/Older links."""
+    args = request.args.to_dict(flat=False)
+    args.pop('after', None)
+    args.pop('before', None)
+    args.update((name, value) for name, value in cursor.items() if value)
+    return url_for(request.endpoint, **request.view_args, **args)
+
+
+def paginate(query, per_page, after=None, before=None, sort_key=TRANSACTION_SORT_KEY, descending=True):
+    """One page of `query` ordered by `sort_key` (every column DESC, or every column ASC).
+
+    `after` continues past the row a next_cursor came from; `before` goes back
+    to the rows preceding the row a prev_cursor came from. Pass at most one.
+    Raises ValueError for a malformed cursor.
+    """
+    key = tuple_(*sort_key)
+    forward = [column.desc() if descending else column.asc() for column in sort_key]
+    backward = [column.asc() if descending else column.desc() for column in sort_key]
+
+    def beyond(cursor, reverse=False):
+        # Rows that come after the cursor row in the requested (or, with reverse, the opposite) order
+        cursor_key = _cursor_key(cursor, sort_key)
+        return key < cursor_key if descending != reverse else key > cursor_key
+
+    if before:
+        # Walk backwards from the cursor, then flip the rows into page order
+        rows = query.filter(beyond(before, reverse=True)).order_by(*backward).limit(per_page + 1).all()
+        has_more_before = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_more_after = True
+    else:
+        if after:
+            query = query.filter(beyond(after))
+        rows = query.order_by(*forward).limit(per_page + 1).all()
+        has_more_after = len(rows) > per_page
+        items = rows[:per_page]
+        has_more_before = bool(after)
+
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor(items[-1], sort_key) if items and has_more_after else None,
+        prev_cursor=encode_cursor(items[0], sort_key) if items and has_more_before else None,
+        per_page=per_page
+    )
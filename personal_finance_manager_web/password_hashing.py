@@ -0,0 +1,166 @@
+# personal_finance_manager_web/password_hashing.py
+#
+# Bounded executor for password hashing.
+#
+# scrypt is deliberately slow and memory-hard; run inline, a burst of logins
+# pins every worker thread on CPU and starves all other requests. Hashes are
+# instead computed on a small thread pool (hashlib releases the GIL while
+# hashing), so at most PASSWORD_HASH_WORKERS hashes run at once per process:
+#   PASSWORD_HASH_METHOD      - werkzeug method string, e.g. 'scrypt:32768:8:1' (n:r:p)
+#   PASSWORD_HASH_WORKERS     - concurrent hashes per process
+#   PASSWORD_HASH_MAX_PENDING - hashes queued or running at once; beyond that we fail fast
+#   PASSWORD_HASH_TIMEOUT     - seconds to wait for a hash before giving up
+#
+# Stored hashes carry their own parameters, so older hashes keep verifying after
+# PASSWORD_HASH_METHOD changes; login rehashes them (see needs_rehash).
+# `flask benchmark-password-hash` suggests scrypt parameters for a target latency.
+
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import with_appcontext
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1' # werkzeug's default scrypt parameters
+
+
+class PasswordHashingBusy(Exception):
+    """The hashing queue is full or a hash timed out; the request should be retried later."""
+
+
+def normalize_method(method):
+    """Spell out werkzeug's implicit defaults, so methods compare equal to the prefix of a stored hash."""
+    name, *args = method.split(':')
+    if name == 'scrypt' and not args:
+        return DEFAULT_METHOD
+    if name == 'pbkdf2' and len(args) < 2:
+        return f"pbkdf2:{args[0] if args else 'sha256'}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+class PasswordHasher:
+    def __init__(self, method=DEFAULT_METHOD, max_workers=1, max_pending=16, timeout=5):
+        self.method = normalize_method(method)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created lazily, and recreated after a fork (see chart_pool.ChartRenderPool)
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='password-hash')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if self.max_workers == 0:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy('Too many password hashes pending')
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel() # Only helps if it has not started
+            raise PasswordHashingBusy(f'Password hash exceeded {self.timeout}s')
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True if `pwhash` was made with other parameters than the configured method."""
+        return pwhash.split('$', 1)[0] != self.method
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_INLINE_HASHER = PasswordHasher(max_workers=0)
+
+
+def _get_hasher():
+    if has_app_context() and 'password_hasher' in current_app.extensions:
+        return current_app.extensions['password_hasher']
+    return _INLINE_HASHER # Scripts and shells without the app
+
+
+def hash_password(password):
+    return _get_hasher().hash(password)
+
+
+def verify_password(pwhash, password):
+    return _get_hasher().verify(pwhash, password)
+
+
+def needs_rehash(pwhash):
+    return _get_hasher().needs_rehash(pwhash)
+
+
+# --- Parameter benchmark ---
+
+def benchmark_scrypt(target_ms, r=8, p=1, rounds=3, min_log_n=14, max_log_n=20):
+    """[(n, best ms)] for increasing scrypt n, stopping after the first one over `target_ms`."""
+    results = []
+    for log_n in range(min_log_n, max_log_n + 1):
+        method = f'scrypt:{2 ** log_n}:{r}:{p}'
+        best = None
+        for _ in range(rounds):
+            started = time.perf_counter()
+            generate_password_hash('benchmark-password', method)
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        results.append((2 ** log_n, best))
+        if best > target_ms:
+            break
+    return results
+
+
+@click.command('benchmark-password-hash')
+@click.option('--target-ms', type=float, default=250, show_default=True, help='Acceptable time for one hash.')
+@click.option('--r', 'r', type=int, default=8, show_default=True, help='scrypt block size.')
+@click.option('--p', 'p', type=int, default=1, show_default=True, help='scrypt parallelism.')
+@with_appcontext
+def benchmark_password_hash_command(target_ms, r, p):
+    """Time scrypt on this host and suggest PASSWORD_HASH_METHOD for a target latency."""
+    results = benchmark_scrypt(target_ms, r=r, p=p)
+    for n, ms in results:
+        click.echo(f'scrypt:{n}:{r}:{p}  {ms:8.1f} ms  ({n * r * 128 // (1024 * 1024)} MiB)')
+    fitting = [n for n, ms in results if ms <= target_ms]
+    if not fitting:
+        click.echo(f'No parameters fit in {target_ms:g} ms; the smallest tried was scrypt:{results[0][0]}:{r}:{p}.')
+        return
+    click.echo(f'Suggested: PASSWORD_HASH_METHOD=scrypt:{fitting[-1]}:{r}:{p}')
+    current = current_app.extensions['password_hasher'].method
+    click.echo(f'Current:   PASSWORD_HASH_METHOD={current}')
+
+
+def init_app(app):
+    hasher = PasswordHasher(
+        method=app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+        max_workers=app.config.get('PASSWORD_HASH_WORKERS', 1),
+        max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', 16),
+        timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 5)
+    )
+    app.extensions['password_hasher'] = hasher
+    atexit.register(hasher.shutdown)
+    app.cli.add_command(benchmark_password_hash_command)
@@ -0,0 +1,159 @@
+# personal_finance_manager_web/read_models.py
+#
+# Read-only projections for the list pages.
+#
+# The list templates only print a handful of fields, so instead of hydrating
+# full ORM objects (and then lazy-loading `transaction.category` once per row)
+# these helpers select exactly the columns a page needs, with any joins done in
+# the same statement, and return them as plain namedtuples. The rows are not
+# tracked by the session and cannot be used to write.
+
+from collections import namedtuple
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import func
+
+from database import db
+from models import Budget, BudgetProgress, Category, Transaction
+import pagination
+
+TransactionRow = namedtuple('TransactionRow', 'id date created_at category_name description amount type')
+CategoryRow = namedtuple('CategoryRow', 'id name type')
+BudgetRow = namedtuple('BudgetRow', 'id category amount start_date end_date spent remaining status')
+
+
+def transaction_rows(user_id, txn_type=None):
+    """Query of the user's transactions as TransactionRow columns (category name joined in)."""
+    query = db.session.query(
+        Transaction.id, Transaction.date, Transaction.created_at, Category.name.label('category_name'),
+        Transaction.description, Transaction.amount, Transaction.type
+    ).join(Category, Category.id == Transaction.category_id).filter(Transaction.user_id == user_id)
+    if txn_type:
+        query = query.filter(Transaction.type == txn_type)
+    return query
+
+
+class TransactionFilter:
+    """Filters and sort order for the transaction browser, applied in SQL.
+
+    Each predicate has a matching index (see models.py): type + date
+    -> ix_transactions_user_type_date_cov, category + date -> ix_transactions_user_category_date_cov,
+    amount range / amount sort -> ix_transactions_user_amount.
+    """
+    __slots__ = ('first_day', 'last_day', 'category_ids', 'min_amount', 'max_amount', 'txn_type', 'sort')
+
+    # sort name -> (keyset sort key, descending?)
+    SORTS = {
+        'date_desc': (pagination.TRANSACTION_SORT_KEY, True),
+        'date_asc': (pagination.TRANSACTION_SORT_KEY, False),
+        'amount_desc': ((Transaction.amount, Transaction.id), True),
+        'amount_asc': ((Transaction.amount, Transaction.id), False),
+    }
+
+    def __init__(self, first_day=None, last_day=None, category_ids=(), min_amount=None, max_amount=None,
+                 txn_type=None, sort='date_desc'):
+        self.first_day = first_day
+        self.last_day = last_day
+        self.category_ids = tuple(category_ids)
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.txn_type = txn_type
+        self.sort = sort
+
+    @classmethod
+    def from_args(cls, args):
+        """Parse ?from=&to=&category=&category=&min=&max=&type=&sort=. Raises ValueError."""
+        def parse_date(name):
+            value = args.get(name)
+            return date.fromisoformat(value) if value else None
+
+        def parse_amount(name):
+            value = args.get(name)
+            if not value:
+                return None
+            try:
+                return Decimal(value)
+            except InvalidOperation:
+                raise ValueError(f'Invalid {name} amount.')
+
+        txn_type = args.get('type') or None
+        if txn_type not in (None, 'income', 'expense'):
+            raise ValueError('Invalid transaction type.')
+        sort = args.get('sort') or 'date_desc'
+        if sort not in cls.SORTS:
+            raise ValueError('Invalid sort order.')
+        try:
+            first_day, last_day = parse_date('from'), parse_date('to')
+            category_ids = [int(value) for value in args.getlist('category') if value]
+        except ValueError:
+            raise ValueError('Invalid date or category.')
+        return cls(first_day, last_day, category_ids, parse_amount('min'), parse_amount('max'), txn_type, sort)
+
+    @property
+    def active(self):
+        return any((self.first_day, self.last_day, self.category_ids, self.min_amount is not None,
+                    self.max_amount is not None, self.txn_type))
+
+    def apply(self, query):
+        if self.txn_type:
+            query = query.filter(Transaction.type == self.txn_type)
+        if self.category_ids:
+            query = query.filter(Transaction.category_id.in_(self.category_ids))
+        if self.first_day:
+            query = query.filter(Transaction.date >= self.first_day)
+        if self.last_day:
+            query = query.filter(Transaction.date <= self.last_day)
+        if self.min_amount is not None:
+            query = query.filter(Transaction.amount >= self.min_amount)
+        if self.max_amount is not None:
+            query = query.filter(Transaction.amount <= self.max_amount)
+        return query
+
+
+def transactions_page(user_id, per_page, after=None, before=None, txn_type=None, filters=None):
+    """One keyset page (see pagination.py) of TransactionRow, newest first unless `filters` sorts otherwise."""
+    query = transaction_rows(user_id, txn_type)
+    sort_key, descending = pagination.TRANSACTION_SORT_KEY, True
+    if filters is not None:
+        query = filters.apply(query)
+        sort_key, descending = TransactionFilter.SORTS[filters.sort]
+    page = pagination.paginate(query, per_page, after=after, before=before, sort_key=sort_key, descending=descending)
+    page.items = [TransactionRow._make(row) for row in page.items]
+    return page
+
+
+def category_rows(user_id, order_by=(Category.name,)):
+    return [
+        CategoryRow._make(row)
+        for row in db.session.query(Category.id, Category.name, Category.type)
+            .filter(Category.user_id == user_id).order_by(*order_by)
+    ]
+
+
+def budget_rows(user_id):
+    """The user's budgets with their spend to date, in one query.
+
+    Spend is read from the budget_progress table (see rollups.py), which covers
+    each budget's own start_date..end_date, rather than summed from transactions.
+    """
+    query = db.session.query(
+        Budget.id, Category.name, Budget.amount, Budget.start_date, Budget.end_date,
+        func.coalesce(BudgetProgress.spent, 0)
+    ).join(
+        Category, Category.id == Budget.category_id
+    ).outerjoin(
+        BudgetProgress, BudgetProgress.budget_id == Budget.id
+    ).filter(
+        Budget.user_id == user_id
+    ).order_by(Budget.start_date.desc())
+
+    rows = []
+    for budget_id, category_name, amount, start_date, end_date, spent_total in query:
+        spent_total = Decimal(spent_total).quantize(Decimal('0.01'))
+        remaining = amount - spent_total
+        rows.append(BudgetRow(
+            budget_id, category_name, amount, start_date, end_date, spent_total, remaining,
+            'Under Budget' if remaining >= 0 else 'Over Budget'
+        ))
+    return rows
@@ -0,0 +1,295 @@
+# personal_finance_manager_web/report_cache.py
+#
+# Result cache for the dashboard and report pages.
+#
+# Entries are keyed by (user_id, report, year, month, filters) plus a per-user
+# *generation* token. Whenever a session commits a change to one of that user's
+# Transaction, Category or Budget rows, the user's generation is replaced with a
+# fresh token, which makes every cached report for that user unreachable at once
+# (and only for that user). Stale entries are then aged out by the backend.
+#
+# The generation tokens live in the backend with the entries, so invalidation
+# reaches every worker that shares the backend, and only those.
+#
+# Backends (REPORT_CACHE_BACKEND):
+#   'filesystem' - pickled files under REPORT_CACHE_DIR, shared by the workers on
+#                  one host (default). Without REPORT_CACHE_DIR, a directory per
+#                  database under the system temp dir.
+#   'redis'      - any Redis-compatible server at REPORT_CACHE_REDIS_URL, for
+#                  workers on several hosts
+#   'memory'     - in-process LRU bounded by REPORT_CACHE_MAX_ENTRIES. Only safe
+#                  with a single worker process: a write in one process leaves the
+#                  others serving stale reports until REPORT_CACHE_TTL. Also used
+#                  instead of a shared backend for in-memory SQLite (per process).
+#   'null'       - caching disabled
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from models import Budget, Category, Transaction
+
+KEY_PREFIX = 'report:'
+_TRACKED_MODELS = (Transaction, Category, Budget)
+_PENDING_KEY = 'report_cache_dirty_users'
+
+
+# --- Backends ---
+# Each backend stores opaque Python values and implements get/set/delete/clear.
+
+class NullBackend:
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU cache holding at most `max_entries` values."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class FileSystemBackend:
+    """Pickled entries under `directory`, pruned oldest-first past `max_entries` files."""
+
+    def __init__(self, directory, max_entries=10000):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + '.cache')
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as fh:
+                expires_at, value = pickle.load(fh)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires_at is not None and expires_at < time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh:
+            pickle.dump((expires_at, value), fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key)) # Atomic, so readers never see a partial file
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._prune()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.cache'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def _prune(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.cache'):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass
+        excess = len(entries) - self.max_entries
+        if excess > 0:
+            for _, path in sorted(entries)[:excess]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+
+class RedisBackend:
+    """Wraps a Redis-compatible client (anything with get/set/delete/scan_iter)."""
+
+    def __init__(self, client, default_ttl=None):
+        self.client = client
+        self.default_ttl = default_ttl
+
+    @classmethod
+    def from_url(cls, url, default_ttl=None):
+        import redis # Optional dependency, only needed for this backend
+        return cls(redis.Redis.from_url(url), default_ttl=default_ttl)
+
+    def get(self, key):
+        raw = self.client.get(key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl or self.default_ttl
+        self.client.set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=KEY_PREFIX + '*'):
+            self.client.delete(key)
+
+
+# --- Cache ---
+
+class ReportCache:
+    def __init__(self, backend, ttl=None):
+        self.backend = backend
+        self.ttl = ttl
+
+    def _generation(self, user_id):
+        gen_key = f'{KEY_PREFIX}gen:{user_id}'
+        generation = self.backend.get(gen_key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            self.backend.set(gen_key, generation)
+        return generation
+
+    def make_key(self, user_id, report, year, month, filters=None):
+        filter_part = ','.join(f'{k}={v}' for k, v in sorted((filters or {}).items()))
+        return f'{KEY_PREFIX}{user_id}:{self._generation(user_id)}:{report}:{year}:{month}:{filter_part}'
+
+    def get_or_compute(self, user_id, report, year, month, compute, filters=None):
+        """Return the cached value for this report, calling `compute()` on a miss."""
+        # The generation is read *before* computing, so a commit landing while we
+        # compute only orphans this entry instead of leaving stale data reachable.
+        key = self.make_key(user_id, report, year, month, filters)
+        value = self.backend.get(key)
+        if value is None:
+            value = compute()
+            self.backend.set(key, value, self.ttl)
+        return value
+
+    def invalidate_user(self, user_id):
+        self.backend.set(f'{KEY_PREFIX}gen:{user_id}', uuid.uuid4().hex)
+
+    def clear(self):
+        self.backend.clear()
+
+
+def _in_memory_database(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def create_backend(config):
+    backend = config.get('REPORT_CACHE_BACKEND', 'filesystem')
+    database_uri = config.get('SQLALCHEMY_DATABASE_URI', '')
+    if backend == 'memory' or (backend in ('filesystem', 'redis') and _in_memory_database(database_uri)):
+        return MemoryBackend(max_entries=config.get('REPORT_CACHE_MAX_ENTRIES', 1024))
+    if backend == 'filesystem':
+        # One directory per database, so apps on other databases never read these entries
+        directory = config.get('REPORT_CACHE_DIR') or os.path.join(
+            tempfile.gettempdir(), 'pfm_report_cache', hashlib.sha256(database_uri.encode()).hexdigest()[:16]
+        )
+        return FileSystemBackend(directory, max_entries=config.get('REPORT_CACHE_MAX_ENTRIES', 10000))
+    if backend == 'redis':
+        return RedisBackend.from_url(config['REPORT_CACHE_REDIS_URL'])
+    if backend == 'null':
+        return NullBackend()
+    raise ValueError(f'Unknown REPORT_CACHE_BACKEND: {backend!r}')
+
+
+def get_report_cache():
+    return current_app.extensions['report_cache']
+
+
+# --- Write-driven invalidation (SQLAlchemy session events) ---
+
+def _after_flush(session, flush_context):
+    dirty_users = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, _TRACKED_MODELS) and obj.user_id is not None:
+            dirty_users.add(obj.user_id)
+
+
+def mark_user_dirty(session, user_id):
+    """Invalidate `user_id`'s cached reports when `session` commits.
+
+    For bulk Core statements (imports, merges) that bypass the ORM flush and so
+    are not seen by _after_flush.
+    """
+    session.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+
+def _after_commit(session):
+    dirty_users = session.info.pop(_PENDING_KEY, None)
+    if dirty_users and has_app_context() and 'report_cache' in current_app.extensions:
+        cache = current_app.extensions['report_cache']
+        for user_id in dirty_users:
+            cache.invalidate_user(user_id)
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def init_app(app):
+    app.extensions['report_cache'] = ReportCache(
+        create_backend(app.config),
+        ttl=app.config.get('REPORT_CACHE_TTL')
+    )
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_rollback', _after_rollback)
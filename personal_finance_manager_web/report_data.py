@@ -0,0 +1,293 @@
+# personal_finance_manager_web/report_data.py
+#
+# Data layer for the report pages.
+#
+# Each report loads the user's ledger window once (see report_engine.py), plus
+# one query each for the user's categories (none when category_cache.py already
+# holds them) and budgets, and computes every
+# aggregate from those arrays, so the number of round-trips does not depend on
+# how many categories, budgets or months a report covers.
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func
+
+from database import db
+from models import Budget, BudgetProgress
+import category_cache
+from report_engine import Ledger, add_months, month_end, period_edges, to_decimal
+from rollups import month_start
+
+ZERO = Decimal('0.00')
+
+
+def _user_categories(user_id):
+    return category_cache.user_categories(user_id)
+
+
+def _active_budgets(user_id, month):
+    """(category_id, amount, spent to date) of the budgets running during `month`."""
+    return db.session.query(
+        Budget.category_id, Budget.amount, func.coalesce(BudgetProgress.spent, 0)
+    ).outerjoin(BudgetProgress, BudgetProgress.budget_id == Budget.id).filter(
+        Budget.user_id == user_id,
+        Budget.start_date <= month_end(month),
+        (Budget.end_date >= month) | (Budget.end_date == None)
+    ).order_by(Budget.start_date).all()
+
+
+# Years a report month can fall in: its 12-month trend reaches into the previous
+# year and its month_end() into the next, which must stay within date's range
+MIN_REPORT_YEAR = date.min.year + 1
+MAX_REPORT_YEAR = date.max.year - 1
+
+
+def monthly_summary_data(user_id, month, trend_months=12):
+    """Everything monthly_summary_report renders, in three queries."""
+    month = month_start(month)
+    first_month = add_months(month, -(trend_months - 1))
+
+    categories = _user_categories(user_id)
+    expense_categories = [c for c in categories if c.type == 'expense']
+    income_categories = [c for c in categories if c.type == 'income']
+
+    ledger = Ledger.load(user_id, first_month, month_end(month))
+    by_category = ledger.category_totals(month, month_end(month)) # {category_id: (income, expense)} in minor units
+    income_trend, expense_trend = ledger.monthly_totals(first_month, trend_months)
+
+    def category_total(category_id, txn_type=None):
+        income, expense = by_category.get(category_id, (0, 0))
+        if txn_type == 'income':
+            return to_decimal(income)
+        if txn_type == 'expense':
+            return to_decimal(expense)
+        return to_decimal(income + expense)
+
+    category_data = [
+        {'name': c.name, 'type': c.type, 'total': category_total(c.id)}
+        for c in expense_categories + income_categories
+    ]
+
+    # Budget category names come from the categories already loaded, not a lazy load per budget.
+    # Spend covers each budget's own period (budget_progress), not just this month.
+    category_names = {c.id: c.name for c in categories}
+    budget_summary = []
+    for budget_category_id, budgeted, spent in _active_budgets(user_id, month):
+        spent = Decimal(spent).quantize(Decimal('0.01'))
+        remaining = budgeted - spent
+        budget_summary.append({
+            'category': category_names.get(budget_category_id, 'N/A'),
+            'budgeted': budgeted,
+            'spent': spent,
+            'remaining': remaining,
+            'status': 'Under Budget' if remaining >= 0 else 'Over Budget'
+        })
+
+    monthly_data = []
+    for i in range(trend_months): # Chronological order (oldest first)
+        income = to_decimal(income_trend[i])
+        expense = to_decimal(expense_trend[i])
+        monthly_data.append({
+            'month': add_months(first_month, i).strftime('%B %Y'),
+            'income': income,
+            'expense': expense,
+            'net': income - expense
+        })
+
+    expense_breakdown_chart_data = [
+        {'category': c.name, 'amount': float(category_total(c.id, 'expense'))}
+        for c in expense_categories
+        if category_total(c.id, 'expense') > 0
+    ]
+
+    return {
+        'total_income': to_decimal(income_trend[-1]),
+        'total_expenses': to_decimal(expense_trend[-1]),
+        'category_data': category_data,
+        'budget_summary': budget_summary,
+        'monthly_data': monthly_data,
+        'expense_breakdown_chart_data': expense_breakdown_chart_data,
+    }
+
+
+def expense_breakdown_data(user_id, month, category_id=None):
+    """Category-wise expense totals for one month, in two queries.
+
+    Returns (all_expense_categories, breakdown rows sorted by total_spent desc, total).
+    Categories are returned as plain {'id', 'name'} dicts so the result can be cached.
+    """
+    month = month_start(month)
+    all_expense_categories = [
+        {'id': c.id, 'name': c.name}
+        for c in category_cache.user_categories(user_id, 'expense')
+    ]
+    by_category = Ledger.load(user_id, month, month_end(month), txn_type='expense').category_totals(month, month_end(month))
+
+    if category_id:
+        selected = [c for c in all_expense_categories if c['id'] == category_id]
+    else:
+        selected = all_expense_categories
+
+    breakdown = []
+    total = ZERO
+    for category in selected:
+        spent = to_decimal(by_category.get(category['id'], (0, 0))[1])
+        # A single selected category is always listed, even with nothing spent
+        if category_id or spent > 0:
+            breakdown.append({'name': category['name'], 'total_spent': spent})
+        total += spent
+
+    breakdown.sort(key=lambda x: x['total_spent'], reverse=True)
+    return all_expense_categories, breakdown, total
+
+
+# --- Date-range reports ---
+
+# Named ranges offered by the date-range report, relative to today
+REPORT_PERIODS = ('month', 'quarter', 'fiscal_year', 'year', 'last_12_months', 'last_5_years')
+MAX_REPORT_PERIODS = 600 # 50 years by month
+
+
+def period_range(period, today, fiscal_year_start_month=4):
+    """(first_day, last_day) of the named period containing `today`."""
+    this_month = today.replace(day=1)
+    if period == 'month':
+        return this_month, month_end(this_month)
+    if period == 'quarter':
+        first = add_months(this_month, -((today.month - 1) % 3))
+        return first, month_end(add_months(first, 2))
+    if period == 'fiscal_year':
+        first = add_months(this_month, -((today.month - fiscal_year_start_month) % 12))
+        return first, month_end(add_months(first, 11))
+    if period == 'year':
+        return date(today.year, 1, 1), date(today.year, 12, 31)
+    if period == 'last_12_months':
+        return add_months(this_month, -11), month_end(this_month)
+    if period == 'last_5_years':
+        return date(today.year - 4, 1, 1), date(today.year, 12, 31)
+    raise ValueError(f'Unknown report period: {period}')
+
+
+def _period_label(first_day, last_day, granularity):
+    if granularity == 'month' or (first_day.year, first_day.month) == (last_day.year, last_day.month):
+        return first_day.strftime('%b %Y')
+    return f"{first_day.strftime('%b %Y')} - {last_day.strftime('%b %Y')}"
+
+
+def range_report_data(user_id, first_day, last_day, granularity='month'):
+    """Totals for [first_day, last_day] split into month/quarter/year periods, in two queries.
+
+    Periods are aligned to the month first_day falls in, so a fiscal year split
+    by quarter gives fiscal quarters. The first and last periods are cut to the range.
+    """
+    categories = _user_categories(user_id)
+    ledger = Ledger.load(user_id, first_day, last_day)
+
+    edges = period_edges(first_day, last_day, granularity, anchor_month=first_day.month)
+    income_totals, expense_totals = ledger.period_totals(edges)
+    periods = []
+    for i in range(len(edges) - 1):
+        period_last_day = edges[i + 1] - timedelta(days=1)
+        income = to_decimal(income_totals[i])
+        expense = to_decimal(expense_totals[i])
+        periods.append({
+            'label': _period_label(edges[i], period_last_day, granularity),
+            'first_day': edges[i],
+            'last_day': period_last_day,
+            'income': income,
+            'expense': expense,
+            'net': income - expense
+        })
+
+    by_category = ledger.category_totals(first_day, last_day)
+    category_data = []
+    for c in sorted(categories, key=lambda c: (c.type != 'expense', c.name)): # Expenses first, like the monthly summary
+        income, expense = by_category.get(c.id, (0, 0))
+        total = to_decimal(income + expense)
+        if total:
+            category_data.append({'name': c.name, 'type': c.type, 'total': total})
+
+    return {
+        'first_day': first_day,
+        'last_day': last_day,
+        'granularity': granularity,
+        'total_income': to_decimal(income_totals.sum()),
+        'total_expenses': to_decimal(expense_totals.sum()),
+        'periods': periods,
+        'category_data': category_data,
+    }
+
+
+# --- Compact JSON series for the /api/reports/* endpoints ---
+
+def _num(value):
+    return round(float(value), 2)
+
+
+def monthly_summary_json(summary, month):
+    monthly_data = summary['monthly_data']
+    return {
+        'month': month.strftime('%Y-%m'),
+        'totals': {
+            'income': _num(summary['total_income']),
+            'expense': _num(summary['total_expenses']),
+            'net': _num(summary['total_income'] - summary['total_expenses']),
+        },
+        'categories': {
+            'names': [c['name'] for c in summary['category_data']],
+            'types': [c['type'] for c in summary['category_data']],
+            'totals': [_num(c['total']) for c in summary['category_data']],
+        },
+        'trend': {
+            'months': [m['month'] for m in monthly_data],
+            'income': [_num(m['income']) for m in monthly_data],
+            'expense': [_num(m['expense']) for m in monthly_data],
+        },
+        'budgets': [
+            {
+                'category': b['category'],
+                'budgeted': _num(b['budgeted']),
+                'spent': _num(b['spent']),
+                'remaining': _num(b['remaining']),
+                'status': b['status'],
+            }
+            for b in summary['budget_summary']
+        ],
+    }
+
+
+def expense_breakdown_json(breakdown, total, month):
+    return {
+        'month': month.strftime('%Y-%m'),
+        'total': _num(total),
+        'categories': {
+            'names': [row['name'] for row in breakdown],
+            'totals': [_num(row['total_spent']) for row in breakdown],
+        },
+    }
+
+
+def range_report_json(report):
+    periods = report['periods']
+    return {
+        'from': report['first_day'].isoformat(),
+        'to': report['last_day'].isoformat(),
+        'granularity': report['granularity'],
+        'totals': {
+            'income': _num(report['total_income']),
+            'expense': _num(report['total_expenses']),
+            'net': _num(report['total_income'] - report['total_expenses']),
+        },
+        'periods': {
+            'labels': [p['label'] for p in periods],
+            'income': [_num(p['income']) for p in periods],
+            'expense': [_num(p['expense']) for p in periods],
+            'net': [_num(p['net']) for p in periods],
+        },
+        'categories': {
+            'names': [c['name'] for c in report['category_data']],
+            'types': [c['type'] for c in report['category_data']],
+            'totals': [_num(c['total']) for c in report['category_data']],
+        },
+    }
@@ -0,0 +1,162 @@
+# personal_finance_manager_web/report_engine.py
+#
+# Vectorized aggregation engine for the reports.
+#
+# A user's ledger for a date range is loaded once, with a single query, into
+# columnar NumPy arrays:
+#   dates        - int32 proleptic Gregorian ordinals (date.toordinal())
+#   amounts      - int64 amounts in minor units (paise/cents), so sums are exact
+#   category_idx - int32 index into `category_ids`
+#   is_expense   - bool type flag (False means income)
+# Period totals (month, quarter, year), category totals, budget spend and trends
+# are then computed with np.searchsorted (bucketing dates into periods) and
+# integer np.add.at sums per bucket/category instead of one SQL query each.
+# (np.bincount would be faster, but it sums its weights as float64.)
+#
+# The rows come from the rollup tables rather than raw transactions: whole
+# months are read from monthly_totals and only the partial months at either end
+# of the range from daily_totals. A load is therefore bounded by
+# (months + ~62 days) x categories, so a five-year trend costs about as much as
+# a one-month view. Period boundaries inside the range must fall on the first
+# of a month (period_edges guarantees this).
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from sqlalchemy import select, union_all
+
+from database import db
+from models import DailyTotal, MonthlyTotal
+
+# Months per period for the supported report granularities
+GRANULARITY_MONTHS = {'month': 1, 'quarter': 3, 'year': 12}
+
+
+def add_months(day, months):
+    """First day of the month `months` away from `day` (negative goes back)."""
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_end(day):
+    """Last day of the month containing `day`."""
+    return add_months(day, 1) - timedelta(days=1)
+
+
+def month_edges(first_month, n_months):
+    """The n_months + 1 month boundaries starting at first_month."""
+    return [add_months(first_month, i) for i in range(n_months + 1)]
+
+
+def period_edges(first_day, last_day, granularity='month', anchor_month=1):
+    """Boundaries of the periods covering [first_day, last_day].
+
+    Periods are `granularity` long and start in months aligned to `anchor_month`
+    (e.g. 4 for an April-March fiscal year). The first and last periods are cut
+    to the range, so the result starts at first_day and ends at last_day + 1 day.
+    """
+    step = GRANULARITY_MONTHS[granularity]
+    boundary = add_months(first_day, 1)
+    offset = (boundary.month - anchor_month) % step
+    if offset:
+        boundary = add_months(boundary, step - offset)
+
+    edges = [first_day]
+    while boundary <= last_day:
+        edges.append(boundary)
+        boundary = add_months(boundary, step)
+    edges.append(last_day + timedelta(days=1))
+    return edges
+
+
+def to_decimal(minor_units):
+    return Decimal(int(minor_units)).scaleb(-2)
+
+
+class Ledger:
+    __slots__ = ('dates', 'amounts', 'category_idx', 'is_expense', 'category_ids')
+
+    def __init__(self, dates, amounts, category_idx, is_expense, category_ids):
+        self.dates = dates
+        self.amounts = amounts
+        self.category_idx = category_idx
+        self.is_expense = is_expense
+        self.category_ids = category_ids
+
+    @classmethod
+    def load(cls, user_id, first_day, last_day, txn_type=None):
+        """Load the user's totals for days [first_day, last_day] in one query."""
+        first_whole = first_day if first_day.day == 1 else add_months(first_day, 1)
+        after_whole = add_months(last_day, 1) if last_day == month_end(last_day) else last_day.replace(day=1)
+
+        def rows_between(model, period, first, last):
+            stmt = select(period, model.category_id, model.type, model.total).where(
+                model.user_id == user_id, period >= first, period <= last
+            )
+            if txn_type:
+                stmt = stmt.where(model.type == txn_type)
+            return stmt
+
+        one_day = timedelta(days=1)
+        if first_whole < after_whole:
+            parts = [rows_between(MonthlyTotal, MonthlyTotal.month, first_whole, after_whole - one_day)]
+            if first_day < first_whole:
+                parts.append(rows_between(DailyTotal, DailyTotal.day, first_day, first_whole - one_day))
+            if after_whole <= last_day:
+                parts.append(rows_between(DailyTotal, DailyTotal.day, after_whole, last_day))
+        else:
+            # The range sits inside a single month
+            parts = [rows_between(DailyTotal, DailyTotal.day, first_day, last_day)]
+
+        stmt = parts[0] if len(parts) == 1 else union_all(*parts)
+        return cls.from_rows(db.session.execute(stmt).all())
+
+    @classmethod
+    def from_rows(cls, rows):
+        # rows: iterable of (date, category_id, type, amount)
+        n = len(rows)
+        dates = np.empty(n, dtype=np.int32)
+        amounts = np.empty(n, dtype=np.int64)
+        raw_category_ids = np.empty(n, dtype=np.int64)
+        is_expense = np.empty(n, dtype=bool)
+        for i, (day, category_id, txn_type, amount) in enumerate(rows):
+            dates[i] = day.toordinal()
+            amounts[i] = int(Decimal(amount).scaleb(2).to_integral_value()) # Amounts have two decimal places
+            raw_category_ids[i] = category_id
+            is_expense[i] = txn_type == 'expense'
+        category_ids, category_idx = np.unique(raw_category_ids, return_inverse=True)
+        return cls(dates, amounts, category_idx.astype(np.int32), is_expense, category_ids)
+
+    # --- Aggregations (all amounts returned in minor units) ---
+
+    def _sum(self, buckets, mask, n_buckets):
+        totals = np.zeros(n_buckets, dtype=np.int64)
+        np.add.at(totals, buckets[mask], self.amounts[mask]) # int64 throughout, so exact
+        return totals
+
+    def period_totals(self, edges):
+        """(income[n], expense[n]) per period, for the n periods between the n + 1 dates in `edges`."""
+        n_periods = len(edges) - 1
+        ordinals = np.array([edge.toordinal() for edge in edges], dtype=np.int32)
+        bucket = np.searchsorted(ordinals, self.dates, side='right') - 1
+        in_range = (bucket >= 0) & (bucket < n_periods)
+        bucket = np.where(in_range, bucket, 0)
+        income = self._sum(bucket, in_range & ~self.is_expense, n_periods)
+        expense = self._sum(bucket, in_range & self.is_expense, n_periods)
+        return income, expense
+
+    def monthly_totals(self, first_month, n_months):
+        """(income[n_months], expense[n_months]) per calendar month from first_month."""
+        return self.period_totals(month_edges(first_month, n_months))
+
+    def category_totals(self, first_day, last_day):
+        """{category_id: (income, expense)} over days [first_day, last_day]."""
+        in_range = (self.dates >= first_day.toordinal()) & (self.dates <= last_day.toordinal())
+        n = len(self.category_ids)
+        income = self._sum(self.category_idx, in_range & ~self.is_expense, n)
+        expense = self._sum(self.category_idx, in_range & self.is_expense, n)
+        return {
+            int(category_id): (int(income[i]), int(expense[i]))
+            for i, category_id in enumerate(self.category_ids)
+        }
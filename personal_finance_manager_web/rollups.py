@@ -0,0 +1,333 @@
+# personal_finance_manager_web/rollups.py
+#
+# Keeps the `daily_totals`, `monthly_totals` and `budget_progress` tables in step
+# with `transactions` (and `budgets`).
+#
+# Every flush that adds, edits or deletes a Transaction is turned into a set of
+# (user_id, day, type, category_id) -> amount deltas which are upserted into
+# daily_totals, folded into per-month deltas for monthly_totals, and added to the
+# budget_progress row of every budget whose category and date range cover the
+# day, inside the same database transaction, so the rollups can never disagree
+# with the rows they summarise. A budget's progress row is recomputed when the
+# budget is created or its category or dates change.
+#
+# `flask rebuild-daily-totals` / `flask rebuild-monthly-totals` /
+# `flask rebuild-budget-progress` recompute a table from scratch (initial
+# backfill, or repair after manual SQL edits).
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import and_, bindparam, event, extract, func, inspect, or_, select, text, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from database import db
+from models import Budget, BudgetProgress, DailyTotal, MonthlyTotal, Transaction
+
+REBUILD_CHUNK_SIZE = 5000
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def _to_decimal(value):
+    # Some write paths assign floats or strings to Transaction.amount before flush
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _old_value(state, attr):
+    """Value of `attr` as it was loaded from the database (before pending edits)."""
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return history.added[0] if history.added else None
+
+
+def _key(user_id, txn_date, txn_type, category_id):
+    if txn_date is None:
+        # Not assigned yet; the column default will be applied on INSERT
+        txn_date = Transaction.__table__.c.date.default.arg
+    return (user_id, txn_date, txn_type, category_id)
+
+
+def collect_deltas(session):
+    """Net (user_id, day, type, category_id) -> amount change implied by the session's pending Transaction writes."""
+    deltas = defaultdict(Decimal)
+
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            deltas[_key(obj.user_id, obj.date, obj.type, obj.category_id)] += _to_decimal(obj.amount)
+
+    for obj in session.deleted:
+        if isinstance(obj, Transaction):
+            state = inspect(obj)
+            old_key = _key(*(_old_value(state, a) for a in ('user_id', 'date', 'type', 'category_id')))
+            deltas[old_key] -= _to_decimal(_old_value(state, 'amount'))
+
+    for obj in session.dirty:
+        if isinstance(obj, Transaction) and session.is_modified(obj, include_collections=False):
+            state = inspect(obj)
+            old_key = _key(*(_old_value(state, a) for a in ('user_id', 'date', 'type', 'category_id')))
+            deltas[old_key] -= _to_decimal(_old_value(state, 'amount'))
+            deltas[_key(obj.user_id, obj.date, obj.type, obj.category_id)] += _to_decimal(obj.amount)
+
+    return {key: delta for key, delta in deltas.items() if delta != 0}
+
+
+def _upsert_totals(session, table, period_column, deltas):
+    """Add each delta to its rollup row, creating the row if needed."""
+    dialect = session.get_bind().dialect.name
+    period = table.c[period_column]
+    rows = [
+        {'user_id': user_id, period_column: period_start, 'type': txn_type, 'category_id': category_id, 'total': delta}
+        for (user_id, period_start, txn_type, category_id), delta in deltas.items()
+    ]
+
+    if dialect in ('postgresql', 'sqlite'):
+        # One executemany for all keys (bulk imports can touch thousands at once)
+        insert = pg_insert if dialect == 'postgresql' else sqlite_insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, period, table.c.type, table.c.category_id],
+            set_={'total': table.c.total + stmt.excluded.total}
+        )
+        session.execute(stmt, rows)
+        return
+
+    # Generic fallback for dialects without INSERT ... ON CONFLICT
+    for values in rows:
+        result = session.execute(
+            table.update().where(
+                table.c.user_id == values['user_id'],
+                period == values[period_column],
+                table.c.type == values['type'],
+                table.c.category_id == values['category_id']
+            ).values(total=table.c.total + values['total'])
+        )
+        if result.rowcount == 0:
+            session.execute(table.insert().values(**values))
+
+
+def _budget_progress_update():
+    progress = BudgetProgress.__table__
+    budgets = Budget.__table__
+    covering_budgets = select(budgets.c.id).where(
+        budgets.c.user_id == bindparam('p_user_id'),
+        budgets.c.category_id == bindparam('p_category_id'),
+        budgets.c.start_date <= bindparam('p_day'),
+        or_(budgets.c.end_date == None, budgets.c.end_date >= bindparam('p_day'))
+    )
+    return progress.update().where(progress.c.budget_id.in_(covering_budgets)).values(
+        spent=progress.c.spent + bindparam('p_delta')
+    )
+
+
+def apply_deltas(session, deltas):
+    """Apply `deltas` (as returned by collect_deltas) to daily_totals, monthly_totals and budget_progress."""
+    if not deltas:
+        return
+    monthly = defaultdict(Decimal)
+    for (user_id, day, txn_type, category_id), delta in deltas.items():
+        monthly[(user_id, month_start(day), txn_type, category_id)] += delta
+
+    _upsert_totals(session, DailyTotal.__table__, 'day', deltas)
+    monthly = {key: delta for key, delta in monthly.items() if delta != 0}
+    if monthly:
+        _upsert_totals(session, MonthlyTotal.__table__, 'month', monthly)
+
+    # One executemany; each row hits the budgets (user_id, category_id, start_date) index
+    expense_rows = [
+        {'p_user_id': user_id, 'p_day': day, 'p_category_id': category_id, 'p_delta': delta}
+        for (user_id, day, txn_type, category_id), delta in deltas.items()
+        if txn_type == 'expense'
+    ]
+    if expense_rows:
+        session.execute(_budget_progress_update(), expense_rows)
+
+
+def _budget_spent_select(budget_filter):
+    """SELECT budget id, expense total over the budget's period, for budgets matching `budget_filter`."""
+    return select(
+        Budget.id, func.coalesce(func.sum(Transaction.amount), 0)
+    ).select_from(Budget).outerjoin(Transaction, and_(
+        Transaction.user_id == Budget.user_id,
+        Transaction.category_id == Budget.category_id,
+        Transaction.type == 'expense',
+        Transaction.date >= Budget.start_date,
+        or_(Budget.end_date == None, Transaction.date <= Budget.end_date)
+    )).where(budget_filter).group_by(Budget.id)
+
+
+def recompute_budget_progress(session, budget_ids):
+    """Replace the budget_progress rows of `budget_ids` with totals summed from transactions."""
+    progress = BudgetProgress.__table__
+    session.execute(progress.delete().where(progress.c.budget_id.in_(budget_ids)))
+    session.execute(progress.insert().from_select(
+        ['budget_id', 'spent'], _budget_spent_select(Budget.id.in_(budget_ids))
+    ))
+
+
+def _before_flush(session, flush_context, instances):
+    apply_deltas(session, collect_deltas(session))
+
+
+_BUDGET_PERIOD_ATTRS = ('user_id', 'category_id', 'start_date', 'end_date')
+
+
+def _after_flush(session, flush_context):
+    # Budgets have ids (and their rows are written) only after the flush
+    changed = [obj.id for obj in session.new if isinstance(obj, Budget)]
+    changed += [
+        obj.id for obj in session.dirty
+        if isinstance(obj, Budget) and any(inspect(obj).attrs[a].history.has_changes() for a in _BUDGET_PERIOD_ATTRS)
+    ]
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Budget)]
+    if changed:
+        recompute_budget_progress(session, changed)
+    if deleted: # ondelete=CASCADE covers this too, but SQLite only enforces it with PRAGMA foreign_keys
+        progress = BudgetProgress.__table__
+        session.execute(progress.delete().where(progress.c.budget_id.in_(deleted)))
+
+
+# --- Read helpers (used by the dashboard and report routes) ---
+
+def month_total(user_id, month, txn_type):
+    return db.session.query(func.sum(MonthlyTotal.total)).filter(
+        MonthlyTotal.user_id == user_id,
+        MonthlyTotal.month == month_start(month),
+        MonthlyTotal.type == txn_type
+    ).scalar() or Decimal('0.00')
+
+
+# --- Backfill / rebuild ---
+
+def _rebuild(table, period_column, period_exprs, to_period, user_id=None):
+    """Replace `table` with totals grouped by `period_exprs`. Returns the number of rows written."""
+    session = db.session
+
+    if session.get_bind().dialect.name == 'postgresql':
+        # Block concurrent transaction writes until the rebuilt rollup is committed,
+        # otherwise a write landing between the SELECT and the COMMIT would be lost.
+        session.execute(text('LOCK TABLE transactions IN SHARE MODE'))
+
+    delete = table.delete()
+    if user_id is not None:
+        delete = delete.where(table.c.user_id == user_id)
+    session.execute(delete)
+
+    query = session.query(
+        Transaction.user_id, *period_exprs, Transaction.type, Transaction.category_id,
+        func.sum(Transaction.amount)
+    ).group_by(Transaction.user_id, *period_exprs, Transaction.type, Transaction.category_id)
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+
+    written = 0
+    chunk = []
+    n_period = len(period_exprs)
+    for row in query:
+        chunk.append({
+            'user_id': row[0],
+            period_column: to_period(*row[1:1 + n_period]),
+            'type': row[1 + n_period],
+            'category_id': row[2 + n_period],
+            'total': row[3 + n_period]
+        })
+        if len(chunk) >= REBUILD_CHUNK_SIZE:
+            session.execute(table.insert(), chunk)
+            written += len(chunk)
+            chunk = []
+    if chunk:
+        session.execute(table.insert(), chunk)
+        written += len(chunk)
+
+    session.commit()
+    return written
+
+
+def rebuild_monthly_totals(user_id=None):
+    """Recompute monthly_totals from the transactions table. Returns the number of rows written."""
+    return _rebuild(
+        MonthlyTotal.__table__, 'month',
+        (extract('year', Transaction.date), extract('month', Transaction.date)),
+        lambda year, month: date(int(year), int(month), 1),
+        user_id
+    )
+
+
+def rebuild_daily_totals(user_id=None):
+    """Recompute daily_totals from the transactions table. Returns the number of rows written."""
+    return _rebuild(DailyTotal.__table__, 'day', (Transaction.date,), lambda day: day, user_id)
+
+
+def rebuild_budget_progress(user_id=None):
+    """Recompute budget_progress from the budgets and transactions tables. Returns the number of rows written."""
+    session = db.session
+    if session.get_bind().dialect.name == 'postgresql':
+        session.execute(text('LOCK TABLE transactions IN SHARE MODE')) # See _rebuild
+
+    progress = BudgetProgress.__table__
+    budget_filter = Budget.user_id == user_id if user_id is not None else true()
+    delete = progress.delete()
+    if user_id is not None:
+        delete = delete.where(progress.c.budget_id.in_(select(Budget.id).where(budget_filter)))
+    session.execute(delete)
+    written = session.execute(progress.insert().from_select(
+        ['budget_id', 'spent'], _budget_spent_select(budget_filter)
+    )).rowcount
+    session.commit()
+    return written
+
+
+def _clear_report_cache():
+    cache = current_app.extensions.get('report_cache')
+    if cache is not None:
+        cache.clear() # Cached reports may have been computed from a wrong rollup
+
+
+@click.command('rebuild-monthly-totals')
+@click.option('--user-id', type=int, default=None, help='Only rebuild rows for this user.')
+@with_appcontext
+def rebuild_monthly_totals_command(user_id):
+    """Backfill or rebuild the monthly_totals rollup table from transactions."""
+    written = rebuild_monthly_totals(user_id)
+    _clear_report_cache()
+    click.echo(f'Rebuilt monthly_totals: {written} rows written.')
+
+
+@click.command('rebuild-daily-totals')
+@click.option('--user-id', type=int, default=None, help='Only rebuild rows for this user.')
+@with_appcontext
+def rebuild_daily_totals_command(user_id):
+    """Backfill or rebuild the daily_totals rollup table from transactions."""
+    written = rebuild_daily_totals(user_id)
+    _clear_report_cache()
+    click.echo(f'Rebuilt daily_totals: {written} rows written.')
+
+
+@click.command('rebuild-budget-progress')
+@click.option('--user-id', type=int, default=None, help='Only rebuild rows for this user.')
+@with_appcontext
+def rebuild_budget_progress_command(user_id):
+    """Backfill or rebuild the budget_progress table from budgets and transactions."""
+    written = rebuild_budget_progress(user_id)
+    _clear_report_cache()
+    click.echo(f'Rebuilt budget_progress: {written} rows written.')
+
+
+def init_app(app):
+    if not event.contains(Session, 'before_flush', _before_flush):
+        event.listen(Session, 'before_flush', _before_flush)
+        event.listen(Session, 'after_flush', _after_flush)
+    app.cli.add_command(rebuild_monthly_totals_command)
+    app.cli.add_command(rebuild_daily_totals_command)
+    app.cli.add_command(rebuild_budget_progress_command)
@@ -3,6 +3,7 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from database import db
 from models import Category # Import the Category model
+import read_models
 
 categories_bp = Blueprint('categories', __name__)
 
@@ -45,7 +46,7 @@ def add_category():
 @categories_bp.route('/view_categories')
 @login_required
 def view_categories():
-    user_categories = Category.query.filter_by(user_id=current_user.id).order_by(Category.type, Category.name).all()
+    user_categories = read_models.category_rows(current_user.id, order_by=(Category.type, Category.name))
     return render_template('categories/view_categories.html', user=current_user, categories=user_categories)
 
 # You can add edit/delete routes here later
\ No newline at end of file
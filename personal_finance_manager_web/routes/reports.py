@@ -1,16 +1,17 @@
 # personal_finance_manager_web/routes/reports.py (REVISED)
 
-from flask import Blueprint, render_template, request, flash
+from flask import Blueprint, render_template, request, flash, redirect, url_for
 from flask_login import login_required, current_user
-from datetime import datetime, timedelta
-from sqlalchemy import func, extract
-from personal_finance_manager_web.database import db
-from personal_finance_manager_web.models import Transaction, Category
+from datetime import datetime, date
+from personal_finance_manager_web.models import Category
+from personal_finance_manager_web.report_engine import Ledger, add_months, month_end, to_decimal
+from personal_finance_manager_web.db_routing import read_replica
 
 reports_bp = Blueprint('reports', __name__)
 
 @reports_bp.route('/reports')
 @login_required
+@read_replica
 def generate_reports():
     user_id = current_user.id
     report_type = request.args.get('type', 'monthly_summary') # Default report type
@@ -23,29 +24,15 @@ def generate_reports():
     # --- Data for Monthly Summary Report (monthly_summary_report.html) ---
     monthly_data = []
     if report_type == 'monthly_summary':
-        # Get data for the last 12 months (or customizable range)
-        for i in range(12): # Last 12 months
-            current_month_start = datetime(year, month, 1) - timedelta(days=(30 * i)) # Approximate month start
-            current_month_start = current_month_start.replace(day=1) # Accurate month start
-
-            current_month_end = (current_month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-
-            month_income = db.session.query(func.sum(Transaction.amount)).filter(
-                Transaction.user_id == user_id,
-                Transaction.type == 'income',
-                Transaction.date >= current_month_start,
-                Transaction.date <= current_month_end
-            ).scalar() or 0.00
-
-            month_expense = db.session.query(func.sum(Transaction.amount)).filter(
-                Transaction.user_id == user_id,
-                Transaction.type == 'expense',
-                Transaction.date >= current_month_start,
-                Transaction.date <= current_month_end
-            ).scalar() or 0.00
-
+        # Last 12 calendar months, loaded once and bucketed by report_engine
+        first_month = add_months(date(year, month, 1), -11)
+        ledger = Ledger.load(user_id, first_month, month_end(date(year, month, 1)))
+        income_trend, expense_trend = ledger.monthly_totals(first_month, 12)
+        for i in range(12):
+            month_income = to_decimal(income_trend[i])
+            month_expense = to_decimal(expense_trend[i])
             monthly_data.append({
-                'month': current_month_start.strftime('%b %Y'),
+                'month': add_months(first_month, i).strftime('%b %Y'),
                 'income': month_income,
                 'expense': month_expense,
                 'net': month_income - month_expense
@@ -55,51 +42,29 @@ def generate_reports():
 
     # --- Data for Expense Breakdown Report (expense_breakdown_report.html) ---
     expense_breakdown_data = []
+    total_breakdown_expense = 0.00
     selected_expense_category_id = request.args.get('expense_category_id', type=int)
 
     if report_type == 'expense_breakdown':
         # Default to current month for breakdown, or use selected month/year
-        breakdown_month_start = datetime(year, month, 1).date()
-        breakdown_month_end = (breakdown_month_start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
-
-        base_expense_query = db.session.query(
-            Category.name,
-            func.sum(Transaction.amount).label('total_spent')
-        ).join(Transaction, Category.id == Transaction.category_id).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == 'expense',
-            Transaction.date >= breakdown_month_start,
-            Transaction.date <= breakdown_month_end
-        )
-
-        if selected_expense_category_id:
-            base_expense_query = base_expense_query.filter(Category.id == selected_expense_category_id)
-            selected_category_obj = Category.query.get(selected_expense_category_id)
-            if not selected_category_obj or selected_category_obj.user_id != user_id or selected_category_obj.type != 'expense':
-                flash("Invalid expense category selected.", 'danger')
-                selected_expense_category_id = None # Reset if invalid
-                # Re-run query without specific category
-                expense_breakdown_data = db.session.query(
-                    Category.name,
-                    func.sum(Transaction.amount).label('total_spent')
-                ).join(Transaction, Category.id == Transaction.category_id).filter(
-                    Transaction.user_id == user_id,
-                    Transaction.type == 'expense',
-                    Transaction.date >= breakdown_month_start,
-                    Transaction.date <= breakdown_month_end
-                ).group_by(Category.name).order_by(desc(func.sum(Transaction.amount))).all()
-            else:
-                # If specific category, just query for that category, no group_by for breakdown
-                expense_breakdown_data = base_expense_query.group_by(Category.name).order_by(desc(func.sum(Transaction.amount))).all()
-                # For a single category, maybe show individual transactions here, not just sum
-                # For now, we'll stick to sums for simplicity in this report.
-        else:
-            expense_breakdown_data = base_expense_query.group_by(Category.name).order_by(desc(func.sum(Transaction.amount))).all()
+        breakdown_month_start = date(year, month, 1)
+
+        if selected_expense_category_id and selected_expense_category_id not in {c.id for c in all_expense_categories}:
+            flash("Invalid expense category selected.", 'danger')
+            selected_expense_category_id = None # Reset if invalid
+
+        breakdown_month_end = month_end(breakdown_month_start)
+        by_category = Ledger.load(user_id, breakdown_month_start, breakdown_month_end, txn_type='expense').category_totals(breakdown_month_start, breakdown_month_end)
+        for category in all_expense_categories:
+            if selected_expense_category_id and category.id != selected_expense_category_id:
+                continue
+            total_spent = to_decimal(by_category.get(category.id, (0, 0))[1])
+            if total_spent > 0:
+                expense_breakdown_data.append({'name': category.name, 'total_spent': total_spent})
+        expense_breakdown_data.sort(key=lambda item: item['total_spent'], reverse=True)
 
         # Calculate total for the breakdown period
-        total_breakdown_expense = sum(item.total_spent for item in expense_breakdown_data if item.total_spent)
-    else:
-        total_breakdown_expense = 0.00
+        total_breakdown_expense = sum(item['total_spent'] for item in expense_breakdown_data)
 
 
     # Render the appropriate report template based on `report_type`
@@ -1,17 +1,17 @@
 # personal_finance_manager_web/routes/transactions.py (REVISED)
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
 from flask_login import login_required, current_user
 from datetime import datetime
 from personal_finance_manager_web.database import db
 from personal_finance_manager_web.models import Transaction, Category, User
-from sqlalchemy import desc
+from personal_finance_manager_web import category_cache, pagination, read_models
 
 transactions_bp = Blueprint('transactions', __name__)
 
 # Helper to get user categories by type
 def get_user_categories_by_type(user_id, category_type):
-    return Category.query.filter_by(user_id=user_id, type=category_type).all()
+    return category_cache.user_categories(user_id, category_type)
 
 # --- ADD EXPENSE ---
 @transactions_bp.route('/transactions/add/expense', methods=['GET', 'POST'])
@@ -25,7 +25,7 @@ def add_expense():
     if request.method == 'POST':
         description = request.form.get('description')
         amount = request.form.get('amount')
-        category_id = request.form.get('category_id')
+        category_id = request.form.get('category_id', type=int)
         transaction_date_str = request.form.get('date')
 
         if not description or not amount or not category_id or not transaction_date_str:
@@ -43,7 +43,7 @@ def add_expense():
             return render_template('transactions/add_expense.html', user=current_user, categories=expense_categories)
 
         # Validate category belongs to user and is of type 'expense'
-        category = Category.query.filter_by(id=category_id, user_id=current_user.id, type='expense').first()
+        category = category_cache.get_category(current_user.id, category_id, 'expense')
         if not category:
             flash('Invalid expense category selected.', 'danger')
             return render_template('transactions/add_expense.html', user=current_user, categories=expense_categories)
@@ -76,7 +76,7 @@ def add_income():
     if request.method == 'POST':
         description = request.form.get('description')
         amount = request.form.get('amount')
-        category_id = request.form.get('category_id')
+        category_id = request.form.get('category_id', type=int)
         transaction_date_str = request.form.get('date')
 
         if not description or not amount or not category_id or not transaction_date_str:
@@ -94,7 +94,7 @@ def add_income():
             return render_template('transactions/add_income.html', user=current_user, categories=income_categories)
 
         # Validate category belongs to user and is of type 'income'
-        category = Category.query.filter_by(id=category_id, user_id=current_user.id, type='income').first()
+        category = category_cache.get_category(current_user.id, category_id, 'income')
         if not category:
             flash('Invalid income category selected.', 'danger')
             return render_template('transactions/add_income.html', user=current_user, categories=income_categories)
@@ -114,19 +114,35 @@ def add_income():
 
     return render_template('transactions/add_income.html', user=current_user, categories=income_categories)
 
+# Helper to get one keyset page of the user's transactions of a type (None if the cursor is invalid)
+def get_transactions_page(transaction_type):
+    per_page = pagination.page_size(request.args.get('per_page', type=int), current_app.config['TRANSACTIONS_PER_PAGE'])
+    try:
+        return read_models.transactions_page(
+            current_user.id, per_page,
+            after=request.args.get('after'), before=request.args.get('before'), txn_type=transaction_type
+        )
+    except ValueError:
+        flash('That page link is no longer valid. Showing the most recent transactions.', 'warning')
+        return None
+
 # --- VIEW EXPENSES ---
 @transactions_bp.route('/transactions/expenses')
 @login_required
 def view_expenses():
-    user_expenses = Transaction.query.filter_by(user_id=current_user.id, type='expense').order_by(desc(Transaction.date)).all()
-    return render_template('transactions/view_expense.html', user=current_user, expenses=user_expenses)
+    page = get_transactions_page('expense')
+    if page is None:
+        return redirect(url_for('transactions.view_expenses'))
+    return render_template('transactions/view_expense.html', user=current_user, expenses=page.items, page=page)
 
 # --- VIEW INCOME ---
 @transactions_bp.route('/transactions/income')
 @login_required
 def view_income():
-    user_income = Transaction.query.filter_by(user_id=current_user.id, type='income').order_by(desc(Transaction.date)).all()
-    return render_template('transactions/view_income.html', user=current_user, income_transactions=user_income)
+    page = get_transactions_page('income')
+    if page is None:
+        return redirect(url_for('transactions.view_income'))
+    return render_template('transactions/view_income.html', user=current_user, income_transactions=page.items, page=page)
 
 
 # --- EDIT TRANSACTION (remains unified, it's an 'edit_transaction.html') ---
@@ -150,7 +166,7 @@ def edit_transaction(transaction_id):
     if request.method == 'POST':
         description = request.form.get('description')
         amount = request.form.get('amount')
-        category_id = request.form.get('category_id')
+        category_id = request.form.get('category_id', type=int)
         transaction_date_str = request.form.get('date')
 
         if not description or not amount or not category_id or not transaction_date_str:
@@ -168,7 +184,7 @@ def edit_transaction(transaction_id):
             return render_template('transactions/edit_transaction.html', user=current_user, categories=relevant_categories, transaction=transaction)
 
         # Validate category belongs to user and is of the correct type
-        category = Category.query.filter_by(id=category_id, user_id=current_user.id, type=transaction.type).first()
+        category = category_cache.get_category(current_user.id, category_id, transaction.type)
         if not category:
             flash('Invalid category selected for this transaction type.', 'danger')
             return render_template('transactions/edit_transaction.html', user=current_user, categories=relevant_categories, transaction=transaction)
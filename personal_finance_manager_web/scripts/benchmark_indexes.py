@@ -0,0 +1,181 @@
+# personal_finance_manager_web/scripts/benchmark_indexes.py
+#
+# Before/after timings for the covering indexes of migration c7e2f4a9b305.
+# Seeds an empty database with synthetic users, categories, budgets and
+# transactions (seed.py, as `flask seed` does), then times the hot queries over the raw tables with the index
+# set from before the migration and with the one it creates:
+#
+#     python scripts/benchmark_indexes.py [--users 50] [--tx-per-user 20000] [--explain]
+#     python scripts/benchmark_indexes.py --database-url postgresql://localhost/pfm_bench
+#
+# Defaults to a throwaway SQLite file. SQLite has no INCLUDE columns, so the
+# covering part only shows on PostgreSQL. The target database must be empty: the
+# script creates the tables and drops them again when it's done.
+
+import argparse
+import importlib.util
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+MIGRATION = os.path.join(APP_DIR, 'migrations', 'versions', 'c7e2f4a9b305_add_covering_indexes_for_hot_queries.py')
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location('covering_indexes', MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def seed(db, n_users, tx_per_user):
+    """Generate the ledger (see seed.py). Returns {user_id: [(category_id, type)]}."""
+    from models import Category
+    import seed
+
+    seed.seed_ledger(n_users, tx_per_user, random_seed=42)
+    by_user = {}
+    for category_id, user_id, category_type in db.session.execute(
+            db.select(Category.id, Category.user_id, Category.type).order_by(Category.id)):
+        by_user.setdefault(user_id, []).append((category_id, category_type))
+    return by_user
+
+
+def hot_queries(db, user_id, user_categories):
+    """(label, statement) for the queries over raw tables that the indexes serve."""
+    from sqlalchemy import func, select
+    from models import Budget, DailyTotal, Transaction
+    import read_models
+    import rollups
+
+    today = date.today()
+    quarter_start = today - timedelta(days=90)
+    expense_ids = [category_id for category_id, category_type in user_categories if category_type == 'expense']
+    category_id = expense_ids[0]
+    filters = read_models.TransactionFilter(first_day=quarter_start, category_ids=[category_id])
+    return [
+        ('budget spend (rollups)', rollups._budget_spent_select(Budget.user_id == user_id)),
+        ('expense by category, quarter', select(Transaction.category_id, func.sum(Transaction.amount)).where(
+            Transaction.user_id == user_id, Transaction.type == 'expense',
+            Transaction.date.between(quarter_start, today)
+        ).group_by(Transaction.category_id)),
+        ('rollup rebuild read, one user', select(
+            Transaction.date, Transaction.type, Transaction.category_id, func.sum(Transaction.amount)
+        ).where(Transaction.user_id == user_id).group_by(Transaction.date, Transaction.type, Transaction.category_id)),
+        ('browser: category + date page', filters.apply(read_models.transaction_rows(user_id))
+            .order_by(Transaction.date.desc(), Transaction.created_at.desc(), Transaction.id.desc()).limit(25).statement),
+        ('category merge deltas', select(DailyTotal.day, DailyTotal.type, DailyTotal.total).where(
+            DailyTotal.user_id == user_id, DailyTotal.category_id == category_id, DailyTotal.total != 0
+        )),
+    ]
+
+
+def set_indexes(db, migration, covering):
+    """Switch between the index set before (covering=False) and after the migration."""
+    import sqlalchemy as sa
+
+    engine = db.engine
+    metadata = sa.MetaData()
+    with engine.begin() as conn:
+        for name, table, columns, include in migration.NEW_INDEXES:
+            conn.execute(sa.text(f'DROP INDEX IF EXISTS {name}'))
+        for name, table, columns in migration.REPLACED_INDEXES:
+            conn.execute(sa.text(f'DROP INDEX IF EXISTS {name}'))
+        if covering:
+            for name, table, columns, include in migration.NEW_INDEXES:
+                table = sa.Table(table, metadata, autoload_with=conn, extend_existing=True)
+                sa.Index(name, *(table.c[c] for c in columns), postgresql_include=include).create(conn)
+        else:
+            for name, table, columns in migration.REPLACED_INDEXES:
+                table = sa.Table(table, metadata, autoload_with=conn, extend_existing=True)
+                sa.Index(name, *(table.c[c] for c in columns)).create(conn)
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level='AUTOCOMMIT')
+        conn.execute(sa.text('VACUUM ANALYZE' if engine.dialect.name == 'postgresql' else 'ANALYZE'))
+
+
+def time_queries(db, samples, rounds):
+    """{label: median ms} over `rounds` runs of each query for every sampled user."""
+    timings = {}
+    with db.engine.connect() as conn:
+        for user_id, user_categories in samples:
+            for label, statement in hot_queries(db, user_id, user_categories):
+                for _ in range(rounds):
+                    started = time.perf_counter()
+                    conn.execute(statement).all()
+                    timings.setdefault(label, []).append((time.perf_counter() - started) * 1000)
+    return {label: statistics.median(values) for label, values in timings.items()}
+
+
+def explain(db, samples):
+    user_id, user_categories = samples[0]
+    prefix = 'EXPLAIN (ANALYZE, BUFFERS)' if db.engine.dialect.name == 'postgresql' else 'EXPLAIN QUERY PLAN'
+    with db.engine.connect() as conn:
+        for label, statement in hot_queries(db, user_id, user_categories):
+            sql = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+            print(f'\n-- {label}')
+            for row in conn.exec_driver_sql(f'{prefix} {sql}'):
+                print('   ', ' '.join(str(value) for value in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the hot queries before and after the covering indexes.')
+    parser.add_argument('--database-url', default=None, help='Empty database to use (default: a temporary SQLite file).')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--tx-per-user', type=int, default=20000)
+    parser.add_argument('--sample-users', type=int, default=10, help='Users the queries are timed for.')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--explain', action='store_true', help='Print query plans with the covering indexes.')
+    args = parser.parse_args()
+
+    tmpdir = None
+    if args.database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        args.database_url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from sqlalchemy import inspect
+
+    from app import create_app
+    from database import db
+
+    migration = load_migration()
+    app = create_app()
+    with app.app_context():
+        if inspect(db.engine).get_table_names():
+            sys.exit(f'{args.database_url} is not empty; point --database-url at a scratch database.')
+        db.create_all()
+        try:
+            started = time.perf_counter()
+            by_user = seed(db, args.users, args.tx_per_user)
+            print(f'Seeded {args.users} users x {args.tx_per_user} transactions '
+                  f'({db.engine.dialect.name}) in {time.perf_counter() - started:.1f}s')
+            samples = random.Random(7).sample(sorted(by_user.items()), min(args.sample_users, len(by_user)))
+
+            set_indexes(db, migration, covering=False)
+            before = time_queries(db, samples, args.rounds)
+            set_indexes(db, migration, covering=True)
+            after = time_queries(db, samples, args.rounds)
+
+            print(f"\n{'query':32} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+            for label in before:
+                speedup = before[label] / after[label] if after[label] else float('inf')
+                print(f'{label:32} {before[label]:10.2f} {after[label]:10.2f} {speedup:7.1f}x')
+            if args.explain:
+                explain(db, samples)
+        finally:
+            db.session.remove()
+            db.drop_all()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
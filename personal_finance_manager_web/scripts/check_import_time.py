@@ -0,0 +1,67 @@
+# personal_finance_manager_web/scripts/check_import_time.py
+#
+# CI guard for worker startup cost. Cold-imports the app and builds it with
+# create_app() in fresh interpreters, then fails if
+#   - any of the heavy report-only libraries (plotly, pandas, matplotlib) got
+#     imported along the way, or
+#   - the fastest run exceeds the time budget.
+#
+#     python scripts/check_import_time.py [--budget-ms 1000] [--runs 5]
+#
+# The budget can also be set with IMPORT_TIME_BUDGET_MS.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('plotly', 'pandas', 'matplotlib')
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+create_app()
+elapsed_ms = (time.perf_counter() - start) * 1000
+heavy = sorted(m for m in sys.modules if m.split('.')[0] in {HEAVY_MODULES!r})
+print(json.dumps({{'elapsed_ms': elapsed_ms, 'heavy': heavy}}))
+"""
+
+
+def run_probe():
+    env = dict(os.environ, DATABASE_URL='sqlite://')
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=APP_DIR, env=env,
+        capture_output=True, text=True, check=True
+    )
+    # The last line is ours; anything before it is the app's own startup output
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail if app startup imports report-only modules or exceeds a time budget.')
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('IMPORT_TIME_BUDGET_MS', 1000)))
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    results = [run_probe() for _ in range(args.runs)]
+    best_ms = min(r['elapsed_ms'] for r in results)
+    heavy = sorted({m for r in results for m in r['heavy']})
+
+    print(f'Cold import + create_app(): best {best_ms:.0f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)')
+    failed = False
+    if heavy:
+        print(f'FAIL: report-only modules imported at startup: {", ".join(heavy[:10])}')
+        failed = True
+    if best_ms > args.budget_ms:
+        print('FAIL: startup time is over budget')
+        failed = True
+    if not failed:
+        print('OK')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
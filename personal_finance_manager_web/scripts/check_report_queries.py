@@ -0,0 +1,105 @@
+# personal_finance_manager_web/scripts/check_report_queries.py
+#
+# Asserts that the report pages issue a fixed number of SQL statements no matter
+# how many categories and budgets a user has. Runs against an in-memory SQLite
+# database, so it needs no services:
+#
+#     python scripts/check_report_queries.py
+#
+# Exits non-zero (for CI) if the statement count grows with the data.
+
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from sqlalchemy import event
+
+from app import create_app
+from database import db
+from models import Budget, Category, Transaction, User
+import report_data
+
+
+def seed_user(username, n_categories, n_budgets):
+    user = User(username=username)
+    user.password_hash = 'x'
+    db.session.add(user)
+    db.session.flush()
+
+    today = date.today()
+    for i in range(n_categories):
+        category_type = 'income' if i % 4 == 0 else 'expense'
+        category = Category(user_id=user.id, name=f'{username}-cat-{i}', type=category_type)
+        db.session.add(category)
+        db.session.flush()
+        for months_back in range(12):
+            db.session.add(Transaction(
+                user_id=user.id,
+                category_id=category.id,
+                type=category_type,
+                amount=Decimal('10.00') + i,
+                date=report_data.add_months(today, -months_back)
+            ))
+        if category_type == 'expense' and n_budgets > 0:
+            db.session.add(Budget(
+                user_id=user.id, category_id=category.id,
+                amount=Decimal('100.00'), start_date=date(today.year - 1, 1, 1)
+            ))
+            n_budgets -= 1
+    db.session.commit()
+    return user.id
+
+
+def count_statements(fn, *args):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        fn(*args)
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return len(statements)
+
+
+def main():
+    app = create_app()
+    failures = []
+    with app.app_context():
+        db.create_all()
+        small = seed_user('small', n_categories=2, n_budgets=1)
+        large = seed_user('large', n_categories=40, n_budgets=25)
+        month = date.today().replace(day=1)
+
+        checks = [
+            ('monthly_summary_data', report_data.monthly_summary_data),
+            ('expense_breakdown_data', report_data.expense_breakdown_data),
+            ('range_report_data (5 years)', lambda user_id, month: report_data.range_report_data(
+                user_id, report_data.add_months(month, -59), report_data.month_end(month), 'quarter'
+            )),
+        ]
+        for name, fn in checks:
+            db.session.expire_all()
+            small_count = count_statements(fn, small, month)
+            db.session.expire_all()
+            large_count = count_statements(fn, large, month)
+            print(f'{name}: {small_count} queries (2 categories), {large_count} queries (40 categories)')
+            if small_count != large_count:
+                failures.append(name)
+
+    if failures:
+        print(f'FAIL: query count grows with data in: {", ".join(failures)}')
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# personal_finance_manager_web/scripts/check_search_paging.py
+#
+# Asserts that paging through search results, forwards and back, returns every
+# matching transaction exactly once when many of them have the same or nearly
+# the same rank. Runs against an in-memory SQLite database by default; pass an
+# empty PostgreSQL database to check the ts_rank ordering:
+#
+#     python scripts/check_search_paging.py
+#     python scripts/check_search_paging.py --database-url postgresql://localhost/pfm_check
+#
+# Exits non-zero (for CI) if a row is repeated or missed, or paging doesn't end.
+
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PER_PAGE = 7
+
+
+def seed_user():
+    from database import db
+    from models import Category, Transaction, User
+
+    user = User(username='search_check')
+    user.password_hash = 'x'
+    db.session.add(user)
+    db.session.flush()
+    coffee = Category(user_id=user.id, name='Coffee', type='expense')
+    other = Category(user_id=user.id, name='Other', type='expense')
+    db.session.add_all([coffee, other])
+    db.session.flush()
+
+    today = date.today()
+    descriptions = (
+        ['Coffee beans'] * 40 # Identical ranks
+        + [f'Coffee beans {"and more " * i}' for i in range(1, 25)] # Nearly equal ranks
+        + ['Morning coffee'] * 15
+    )
+    for i, description in enumerate(descriptions):
+        db.session.add(Transaction(
+            user_id=user.id, category_id=(coffee if i % 3 else other).id, type='expense',
+            amount=Decimal('3.50'), description=description, date=today - timedelta(days=i % 10)
+        ))
+    db.session.add(Transaction(
+        user_id=user.id, category_id=other.id, type='expense', amount=Decimal('9.00'),
+        description='Train ticket', date=today
+    ))
+    db.session.commit()
+    return user.id, len(descriptions)
+
+
+def walk(user_id, query, direction):
+    """Ids of every result, following next cursors (or prev cursors back from the last page)."""
+    import search
+
+    ids = []
+    page = search.search_page(user_id, query, PER_PAGE)
+    if direction == 'before':
+        while page.has_next:
+            page = search.search_page(user_id, query, PER_PAGE, after=page.next_cursor)
+    max_pages = 1000 # A cursor that doesn't move on would otherwise loop forever
+    while True:
+        page_ids = [row.id for row in page.items]
+        ids = ids + page_ids if direction == 'after' else page_ids + ids
+        cursor = page.next_cursor if direction == 'after' else page.prev_cursor
+        if cursor is None:
+            return ids
+        max_pages -= 1
+        if max_pages == 0:
+            raise RuntimeError('paging did not end')
+        page = search.search_page(user_id, query, PER_PAGE, **{direction: cursor})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that search pages never repeat or skip a row.')
+    parser.add_argument('--database-url', default='sqlite://', help='Empty database to use (default: in-memory SQLite).')
+    args = parser.parse_args()
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from sqlalchemy import inspect
+
+    from app import create_app
+    from database import db
+
+    app = create_app()
+    failures = []
+    with app.app_context():
+        if inspect(db.engine).get_table_names():
+            sys.exit(f'{args.database_url} is not empty; point --database-url at a scratch database.')
+        db.create_all(bind_key=None)
+        try:
+            user_id, n_matching = seed_user()
+            for query in ('coffee', 'coffee beans'):
+                for direction in ('after', 'before'):
+                    try:
+                        ids = walk(user_id, query, direction)
+                    except RuntimeError as e:
+                        failures.append(f'{query!r} ({direction}): {e}')
+                        continue
+                    repeated = len(ids) - len(set(ids))
+                    print(f'{query!r} paging {direction}: {len(ids)} rows, {repeated} repeated')
+                    expected = n_matching if query == 'coffee' else n_matching - 15
+                    if repeated or len(set(ids)) != expected:
+                        failures.append(f'{query!r} ({direction}): {len(set(ids))} distinct rows of {expected}, '
+                                        f'{repeated} repeated')
+        finally:
+            db.session.remove()
+            db.drop_all(bind_key=None)
+
+    if failures:
+        print('FAIL: ' + '; '.join(failures))
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
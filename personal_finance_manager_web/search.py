@@ -0,0 +1,142 @@
+# personal_finance_manager_web/search.py
+#
+# Full-text search over transaction descriptions and category names.
+#
+# PostgreSQL: transactions.search_vector is a stored generated tsvector column
+# over the description, with a GIN index (ix_transactions_search_vector). Category
+# names live in another table, so they are matched separately against the
+# user's (few) categories, and the matching category ids are OR-ed into the
+# query. Ranking uses ts_rank with category hits weighted above description hits.
+#
+# SQLite: an FTS5 table, transaction_search(description, category), keyed by
+# transaction id and kept current by triggers on transactions and categories.
+# Ranking uses bm25().
+#
+# Both index structures are created by migration 3d8c5f1b7e92 for existing
+# databases, and by the DDL below when the tables are created with create_all().
+# Search terms are reduced to words and matched as prefixes, with every word
+# required. Results are ranked and keyset-paginated on (rank DESC, id DESC).
+
+import re
+
+from sqlalchemy import DDL, Float, cast, column, event, func, literal_column, or_, table
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+
+from database import db
+from models import Category, Transaction
+import pagination
+import read_models
+
+MAX_TERMS = 10
+
+POSTGRESQL_DDL = (
+    "ALTER TABLE transactions ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(description, ''))) STORED",
+    "CREATE INDEX ix_transactions_search_vector ON transactions USING gin (search_vector)",
+)
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS transaction_search USING fts5(description, category)",
+    """CREATE TRIGGER IF NOT EXISTS transactions_search_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO transaction_search (rowid, description, category)
+        VALUES (new.id, new.description, (SELECT name FROM categories WHERE id = new.category_id));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_search_update AFTER UPDATE OF description, category_id ON transactions BEGIN
+        UPDATE transaction_search
+        SET description = new.description, category = (SELECT name FROM categories WHERE id = new.category_id)
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_search_delete AFTER DELETE ON transactions BEGIN
+        DELETE FROM transaction_search WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS categories_search_rename AFTER UPDATE OF name ON categories BEGIN
+        UPDATE transaction_search SET category = new.name
+        WHERE rowid IN (SELECT id FROM transactions WHERE category_id = new.id);
+    END""",
+)
+
+# SQLite FTS5 table (not part of the models' metadata)
+TRANSACTION_SEARCH = table('transaction_search', column('rowid'))
+
+# drop_all() drops the transactions table (and its own triggers) but knows nothing of these
+SQLITE_DROP_DDL = (
+    "DROP TRIGGER IF EXISTS categories_search_rename",
+    "DROP TABLE IF EXISTS transaction_search",
+)
+
+_DDL_EVENTS = (
+    [('after_create', DDL(statement).execute_if(dialect='postgresql')) for statement in POSTGRESQL_DDL]
+    + [('after_create', DDL(statement).execute_if(dialect='sqlite')) for statement in SQLITE_DDL]
+    + [('after_drop', DDL(statement).execute_if(dialect='sqlite')) for statement in SQLITE_DROP_DDL]
+)
+
+
+def search_terms(query):
+    """Lower-cased words of a user's query (punctuation and operators dropped)."""
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+def _postgresql_rows(user_id, terms):
+    tsquery = func.to_tsquery('simple', ' & '.join(f'{term}:*' for term in terms))
+    search_vector = literal_column('transactions.search_vector')
+    matching_categories = db.session.query(Category.id).filter(
+        Category.user_id == user_id,
+        func.to_tsvector('simple', Category.name).op('@@')(tsquery)
+    )
+    # ts_rank() is a float4; as float8 the value in a cursor is exactly the one compared with it
+    # (a float4 read back as a Python float and bound as float8 doesn't equal the column value)
+    rank = cast(func.ts_rank(
+        func.setweight(search_vector, literal_column("'B'")).op('||')(
+            func.setweight(func.to_tsvector('simple', Category.name), literal_column("'A'"))
+        ),
+        tsquery
+    ), DOUBLE_PRECISION).label('rank')
+    return read_models.transaction_rows(user_id).add_columns(rank).filter(or_(
+        search_vector.op('@@')(tsquery),
+        Transaction.category_id.in_(matching_categories.scalar_subquery())
+    )), rank
+
+
+def _sqlite_rows(user_id, terms):
+    match = ' '.join(f'"{term}"*' for term in terms)
+    fts = literal_column('transaction_search')
+    # bm25() is lower-is-better; negate it so every backend sorts rank DESC
+    rank = (-func.bm25(fts, type_=Float)).label('rank')
+    return read_models.transaction_rows(user_id).add_columns(rank) \
+        .join(TRANSACTION_SEARCH, TRANSACTION_SEARCH.c.rowid == Transaction.id) \
+        .filter(fts.op('MATCH')(match)), rank
+
+
+def _fallback_rows(user_id, terms):
+    # Unindexed LIKE matching, for other databases
+    rank = literal_column('0', Float).label('rank')
+    conditions = [
+        or_(Transaction.description.ilike(f'%{term}%'), Category.name.ilike(f'%{term}%'))
+        for term in terms
+    ]
+    return read_models.transaction_rows(user_id).add_columns(rank).filter(*conditions), rank
+
+
+def search_page(user_id, query, per_page, after=None, before=None):
+    """One keyset page of the user's transactions matching `query`, best match first.
+
+    Returns None when the query has no searchable words.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return None
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        rows, rank = _postgresql_rows(user_id, terms)
+    elif dialect == 'sqlite':
+        rows, rank = _sqlite_rows(user_id, terms)
+    else:
+        rows, rank = _fallback_rows(user_id, terms)
+    return pagination.paginate(rows, per_page, after=after, before=before, sort_key=(rank, Transaction.id))
+
+
+def init_app(app):
+    table = Transaction.__table__
+    for event_name, ddl in _DDL_EVENTS:
+        if not event.contains(table, event_name, ddl):
+            event.listen(table, event_name, ddl)
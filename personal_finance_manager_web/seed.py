@@ -0,0 +1,209 @@
+# personal_finance_manager_web/seed.py
+#
+# Synthetic ledger data for local benchmarking:
+#
+#     flask seed --users 1000 --tx-per-user 2000 [--months 24] [--random-seed 1]
+#
+# Data is shaped like a real ledger rather than uniform noise, so query plans
+# and cache behaviour resemble production:
+#   - every user gets the same catalogue of income and expense categories
+#     (CATALOGUE); recurring ones (salary, rent, utilities, subscriptions) land
+#     on a fixed day each month, the rest are drawn by weight, so groceries and
+#     dining dominate the row counts
+#   - amounts are lognormal around each category's typical amount, scaled per
+#     user (a long right tail: mostly small purchases, occasional large ones)
+#   - dates lean towards recent months, and activity per user is Pareto
+#     distributed around --tx-per-user (a few heavy users, many light ones)
+#   - each user gets monthly budgets for the last few months on some expense
+#     categories, set around their actual spend so some are exceeded
+#
+# Rows are written like a statement import (importer.write_batch: multi-row
+# INSERT, or COPY on PostgreSQL) with rollups.apply_deltas per batch, and
+# committed every USERS_PER_COMMIT users.
+
+import random
+import time
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func
+
+from database import db
+from models import Budget, Category, User
+import importer
+import password_hashing
+import report_data
+import rollups
+
+USERS_PER_COMMIT = 50
+BUDGET_MONTHS = 3
+MAX_ACTIVITY = 20 # A user has at most this many times the average number of transactions
+
+# typical: median amount; weight: share of the non-recurring transactions;
+# day: day of the month for recurring categories (weight is then unused)
+CategorySpec = namedtuple('CategorySpec', 'name type typical weight day descriptions')
+
+CATALOGUE = (
+    CategorySpec('Salary', 'income', 3200, 0, 25, ('Payroll',)),
+    CategorySpec('Freelance', 'income', 450, 2, None, ('Invoice payment', 'Client transfer')),
+    CategorySpec('Interest', 'income', 12, 0, 28, ('Savings interest',)),
+    CategorySpec('Rent', 'expense', 1100, 0, 1, ('Monthly rent',)),
+    CategorySpec('Utilities', 'expense', 110, 0, 14, ('Electricity', 'Water', 'Internet', 'Gas')),
+    CategorySpec('Subscriptions', 'expense', 14, 0, 5, ('Streaming', 'Music', 'Cloud storage')),
+    CategorySpec('Groceries', 'expense', 42, 30, None, ('Supermarket', 'Farmers market', 'Corner shop', 'Bakery')),
+    CategorySpec('Dining', 'expense', 24, 18, None, ('Restaurant', 'Cafe', 'Takeaway', 'Lunch')),
+    CategorySpec('Transport', 'expense', 11, 18, None, ('Bus fare', 'Train ticket', 'Fuel', 'Taxi')),
+    CategorySpec('Shopping', 'expense', 55, 10, None, ('Clothing', 'Electronics', 'Home goods', 'Books')),
+    CategorySpec('Entertainment', 'expense', 28, 6, None, ('Cinema', 'Concert', 'Games', 'Museum')),
+    CategorySpec('Healthcare', 'expense', 70, 3, None, ('Pharmacy', 'Dentist', 'Doctor')),
+    CategorySpec('Travel', 'expense', 320, 1, None, ('Flight', 'Hotel', 'Car rental')),
+    CategorySpec('Gifts', 'expense', 45, 2, None, ('Birthday gift', 'Donation')),
+)
+
+
+def _amount(rng, typical, scale, sigma=0.6):
+    return max(Decimal('0.50'), Decimal(typical * scale * rng.lognormvariate(0, sigma)).quantize(Decimal('0.01')))
+
+
+def _user_transactions(rng, user_id, categories, n_transactions, first_month, n_months, today):
+    """Yield transaction row dicts for one user."""
+    scale = rng.lognormvariate(0, 0.4) # Richer and poorer users
+    recurring = [(spec, categories[spec.name]) for spec in CATALOGUE if spec.day]
+    drawn = [(spec, categories[spec.name]) for spec in CATALOGUE if not spec.day]
+    weights = [spec.weight for spec, _ in drawn]
+    now = datetime.utcnow()
+
+    def row(spec, category_id, txn_date, amount):
+        return {
+            'user_id': user_id, 'amount': amount, 'description': rng.choice(spec.descriptions),
+            'date': txn_date, 'type': spec.type, 'category_id': category_id, 'created_at': now, 'updated_at': now
+        }
+
+    n_recurring = 0
+    for month_offset in range(n_months):
+        month = report_data.add_months(first_month, month_offset)
+        for spec, category_id in recurring:
+            txn_date = month.replace(day=min(spec.day, 28))
+            if txn_date > today or n_recurring >= n_transactions:
+                continue
+            n_recurring += 1
+            yield row(spec, category_id, txn_date, _amount(rng, spec.typical, scale, sigma=0.05))
+
+    days = (today - first_month).days + 1
+    for _ in range(n_transactions - n_recurring):
+        spec, category_id = rng.choices(drawn, weights)[0]
+        days_ago = int(days * rng.random() ** 1.6) # Denser towards today
+        yield row(spec, category_id, today - timedelta(days=days_ago), _amount(rng, spec.typical, scale))
+
+
+def _monthly_budgets(rng, user_id, spend, today):
+    """Budget rows for the last BUDGET_MONTHS months on about half the categories the user spent in."""
+    this_month = today.replace(day=1)
+    rows = []
+    for category_id in sorted({category_id for category_id, _ in spend}):
+        if rng.random() < 0.5:
+            continue
+        for months_back in range(BUDGET_MONTHS):
+            month = report_data.add_months(this_month, -months_back)
+            spent = spend.get((category_id, month))
+            if not spent:
+                continue
+            rows.append({
+                'user_id': user_id, 'category_id': category_id, 'start_date': month,
+                'end_date': report_data.add_months(month, 1) - timedelta(days=1),
+                'amount': (spent * Decimal(rng.uniform(0.8, 1.4))).quantize(Decimal('1'))
+            })
+    return rows
+
+
+def seed_ledger(n_users, tx_per_user, months=24, random_seed=None, password='password', batch_size=5000,
+                progress=None):
+    """Create `n_users` users with about `tx_per_user` transactions each. Returns (users, transactions, budgets)."""
+    session = db.session
+    rng = random.Random(random_seed)
+    today = date.today()
+    first_month = report_data.add_months(today.replace(day=1), -(months - 1))
+    password_hash = password_hashing.hash_password(password) # One hash for all users
+    first_number = (session.query(func.max(User.id)).scalar() or 0) + 1
+    totals = [0, 0, 0]
+
+    pending, deltas = [], defaultdict(Decimal)
+
+    def write_transactions():
+        if pending:
+            importer.write_batch(session, pending)
+            rollups.apply_deltas(session, {key: delta for key, delta in deltas.items() if delta})
+            totals[1] += len(pending)
+            pending.clear()
+            deltas.clear()
+
+    for group_start in range(0, n_users, USERS_PER_COMMIT):
+        numbers = range(first_number + group_start, first_number + min(group_start + USERS_PER_COMMIT, n_users))
+        session.execute(User.__table__.insert(), [
+            {'username': f'seed_user_{number}', 'password_hash': password_hash} for number in numbers
+        ])
+        user_ids = [user_id for user_id, in session.query(User.id).filter(
+            User.username.in_([f'seed_user_{number}' for number in numbers])
+        ).order_by(User.id)]
+        session.execute(Category.__table__.insert(), [
+            {'user_id': user_id, 'name': spec.name, 'type': spec.type} for user_id in user_ids for spec in CATALOGUE
+        ])
+        categories = defaultdict(dict)
+        for category_id, user_id, name in session.query(Category.id, Category.user_id, Category.name).filter(
+                Category.user_id.in_(user_ids)):
+            categories[user_id][name] = category_id
+
+        budgets = []
+        for user_id in user_ids:
+            activity = min(rng.paretovariate(2) / 2, MAX_ACTIVITY) # Pareto(2) has mean 2
+            n_transactions = max(1, round(tx_per_user * activity))
+            spend = defaultdict(Decimal)
+            for row in _user_transactions(rng, user_id, categories[user_id], n_transactions, first_month, months, today):
+                pending.append(row)
+                deltas[(user_id, row['date'], row['type'], row['category_id'])] += row['amount']
+                if row['type'] == 'expense':
+                    spend[(row['category_id'], row['date'].replace(day=1))] += row['amount']
+                if len(pending) >= batch_size:
+                    write_transactions()
+            budgets += _monthly_budgets(rng, user_id, spend, today)
+        write_transactions()
+
+        if budgets:
+            session.execute(Budget.__table__.insert(), budgets)
+            budget_ids = [budget_id for budget_id, in session.query(Budget.id).filter(Budget.user_id.in_(user_ids))]
+            rollups.recompute_budget_progress(session, budget_ids)
+        session.commit()
+        totals[0] += len(user_ids)
+        totals[2] += len(budgets)
+        if progress:
+            progress(*totals)
+    return tuple(totals)
+
+
+@click.command('seed')
+@click.option('--users', type=int, default=100, show_default=True, help='Users to create.')
+@click.option('--tx-per-user', type=int, default=1000, show_default=True, help='Average transactions per user.')
+@click.option('--months', type=int, default=24, show_default=True, help='Months of history, ending this month.')
+@click.option('--random-seed', type=int, default=None, help='Make the generated data reproducible.')
+@click.option('--password', default='password', show_default=True, help='Password of every generated user.')
+@with_appcontext
+def seed_command(users, tx_per_user, months, random_seed, password):
+    """Bulk-generate users with realistic categories, transactions and budgets."""
+    started = time.perf_counter()
+
+    def progress(n_users, n_transactions, n_budgets):
+        elapsed = time.perf_counter() - started
+        click.echo(f'{n_users}/{users} users, {n_transactions} transactions, {n_budgets} budgets '
+                   f'({n_transactions / elapsed:,.0f} transactions/s)')
+
+    seed_ledger(users, tx_per_user, months=months, random_seed=random_seed, password=password,
+                batch_size=current_app.config.get('IMPORT_BATCH_SIZE', 5000), progress=progress)
+    click.echo(f'Done in {time.perf_counter() - started:.1f}s. Users are seed_user_<n> / {password!r}.')
+
+
+def init_app(app):
+    app.cli.add_command(seed_command)
@@ -0,0 +1,110 @@
+// static/js/report_charts.js
+// Draws the report charts in the browser from the /api/reports/* JSON endpoints.
+// Each chart placeholder looks like <div data-chart="expense-pie" data-src="/api/...">.
+
+(function () {
+    var requests = {}; // One fetch per endpoint URL, shared by every chart on the page
+
+    function loadJSON(url) {
+        if (!requests[url]) {
+            requests[url] = fetch(url, {
+                credentials: 'same-origin',
+                headers: { 'Accept': 'application/json' }
+            }).then(function (response) {
+                if (!response.ok) {
+                    throw new Error('Request failed: ' + response.status);
+                }
+                return response.json();
+            });
+        }
+        return requests[url];
+    }
+
+    function showMessage(el, message) {
+        el.innerHTML = '';
+        var p = document.createElement('p');
+        p.className = 'empty-chart-message';
+        p.textContent = message;
+        el.appendChild(p);
+    }
+
+    function monthLabel(yyyyMm) {
+        var parts = yyyyMm.split('-');
+        var d = new Date(Number(parts[0]), Number(parts[1]) - 1, 1);
+        return d.toLocaleString('en-US', { month: 'long', year: 'numeric' });
+    }
+
+    var layoutDefaults = { margin: { t: 50, b: 0, l: 0, r: 0 } };
+    var config = { responsive: true, displaylogo: false };
+
+    var renderers = {
+        'expense-pie': function (el, data) {
+            var names = [], totals = [];
+            data.categories.names.forEach(function (name, i) {
+                if (data.categories.types[i] === 'expense' && data.categories.totals[i] > 0) {
+                    names.push(name);
+                    totals.push(data.categories.totals[i]);
+                }
+            });
+            if (!names.length) {
+                return showMessage(el, 'No expense data for the selected month to display chart.');
+            }
+            Plotly.newPlot(el, [{
+                type: 'pie', labels: names, values: totals, hole: 0.3,
+                textposition: 'inside', textinfo: 'percent+label'
+            }], Object.assign({
+                title: 'Expense Breakdown for ' + monthLabel(data.month), showlegend: true
+            }, layoutDefaults), config);
+        },
+
+        'income-expense-trend': function (el, data) {
+            if (!data.trend.months.length) {
+                return showMessage(el, 'No income/expense trend data to display chart.');
+            }
+            Plotly.newPlot(el, [
+                { x: data.trend.months, y: data.trend.income, mode: 'lines+markers', name: 'Income', line: { color: 'green' } },
+                { x: data.trend.months, y: data.trend.expense, mode: 'lines+markers', name: 'Expense', line: { color: 'red' } }
+            ], Object.assign({
+                title: 'Income vs. Expense Trend (Last 12 Months from ' + monthLabel(data.month) + ')',
+                xaxis: { title: 'Month' }, yaxis: { title: 'Amount (₹)' }, hovermode: 'x unified'
+            }, layoutDefaults), config);
+        },
+
+        'range-trend': function (el, data) {
+            if (!data.periods.labels.length) {
+                return showMessage(el, 'No income/expense data to display chart.');
+            }
+            Plotly.newPlot(el, [
+                { x: data.periods.labels, y: data.periods.income, mode: 'lines+markers', name: 'Income', line: { color: 'green' } },
+                { x: data.periods.labels, y: data.periods.expense, mode: 'lines+markers', name: 'Expense', line: { color: 'red' } }
+            ], Object.assign({
+                title: 'Income vs. Expense (' + data.from + ' to ' + data.to + ')',
+                xaxis: { title: 'Period', type: 'category' }, yaxis: { title: 'Amount (₹)' }, hovermode: 'x unified'
+            }, layoutDefaults), config);
+        },
+
+        'expense-bar': function (el, data) {
+            if (!data.categories.names.length) {
+                return showMessage(el, 'No expense data for the selected month to display chart.');
+            }
+            Plotly.newPlot(el, [{
+                type: 'bar', x: data.categories.names, y: data.categories.totals, marker: { color: 'skyblue' }
+            }], Object.assign({
+                title: 'Expense Breakdown (' + monthLabel(data.month) + ')',
+                yaxis: { title: 'Amount (₹)' }, xaxis: { tickangle: -45 }
+            }, layoutDefaults, { margin: { t: 50, b: 100, l: 60, r: 0 } }), config);
+        }
+    };
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('[data-chart]').forEach(function (el) {
+            var render = renderers[el.getAttribute('data-chart')];
+            if (!render) {
+                return;
+            }
+            loadJSON(el.getAttribute('data-src'))
+                .then(function (data) { render(el, data); })
+                .catch(function () { showMessage(el, 'The chart could not be loaded.'); });
+        });
+    });
+})();
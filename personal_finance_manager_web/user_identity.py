@@ -0,0 +1,109 @@
+# personal_finance_manager_web/user_identity.py
+#
+# Lightweight, cached identity for Flask-Login's user_loader.
+#
+# Authenticated requests only need current_user.id (and the username for the
+# navigation), not a full `users` row with its password hash. load_user returns
+# a slots-based UserIdentity instead, kept per user id in an in-process LRU
+# (report_cache.MemoryBackend) bounded by USER_IDENTITY_CACHE_MAX_ENTRIES and
+# USER_IDENTITY_CACHE_TTL seconds, so most requests make no query for it.
+#
+# A user's entry is dropped when a session commits a change to their username
+# or password, or deletes them (same session-event scheme as report_cache.py).
+# Invalidation is per process; with several workers the TTL bounds how long
+# another worker can keep serving the old identity. Routes that need the full
+# row (e.g. to change the password) load the User themselves.
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from database import db
+from models import User
+from report_cache import MemoryBackend
+
+_PENDING_KEY = 'user_identity_dirty_users'
+_IDENTITY_ATTRS = ('username', 'password_hash')
+
+
+class UserIdentity:
+    """The signed-in user as Flask-Login sees it: id and username only."""
+    __slots__ = ('id', 'username')
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+    def get_id(self):
+        return str(self.id)
+
+    def __repr__(self):
+        return f"<UserIdentity {self.username} ({self.id})>"
+
+
+class IdentityCache:
+    def __init__(self, max_entries=4096, ttl=None):
+        self.backend = MemoryBackend(max_entries=max_entries)
+        self.ttl = ttl
+
+    def load(self, user_id):
+        identity = self.backend.get(user_id)
+        if identity is None:
+            row = db.session.query(User.id, User.username).filter(User.id == user_id).first()
+            if row is None:
+                return None
+            identity = UserIdentity(*row)
+            self.backend.set(user_id, identity, self.ttl)
+        return identity
+
+    def invalidate_user(self, user_id):
+        self.backend.delete(user_id)
+
+
+def load_user(user_id):
+    """Flask-Login user_loader: the cached UserIdentity for a session's user id, or None."""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    return current_app.extensions['user_identity'].load(user_id)
+
+
+# --- Write-driven invalidation (SQLAlchemy session events) ---
+
+def _after_flush(session, flush_context):
+    dirty_users = session.info.setdefault(_PENDING_KEY, set())
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            dirty_users.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, User) and any(inspect(obj).attrs[a].history.has_changes() for a in _IDENTITY_ATTRS):
+            dirty_users.add(obj.id)
+
+
+def _after_commit(session):
+    dirty_users = session.info.pop(_PENDING_KEY, None)
+    if dirty_users and has_app_context() and 'user_identity' in current_app.extensions:
+        cache = current_app.extensions['user_identity']
+        for user_id in dirty_users:
+            cache.invalidate_user(user_id)
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def init_app(app, login_manager):
+    app.extensions['user_identity'] = IdentityCache(
+        max_entries=app.config.get('USER_IDENTITY_CACHE_MAX_ENTRIES', 4096),
+        ttl=app.config.get('USER_IDENTITY_CACHE_TTL')
+    )
+    login_manager.user_loader(load_user)
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_rollback', _after_rollback)